@@ -1,10 +1,15 @@
+import math
 import numpy as np
-from typing import Tuple, List
+from typing import Tuple
 from dataclasses import dataclass
 
+def _clip(value: float, lower: float, upper: float) -> float:
+    """Scalar clip without NumPy dispatch overhead"""
+    return lower if value < lower else upper if value > upper else value
+
 @dataclass
 class AircraftState:
-    position: Tuple[float, float]  # (x, y) in meters
+    position: np.ndarray  # (x, y) in meters, updated in place
     heading: float  # in radians
     speed: float   # in m/s
     bank_angle: float  # in radians
@@ -12,23 +17,44 @@ class AircraftState:
 class Aircraft:
     def __init__(self, 
                  initial_position: Tuple[float, float],
-                 initial_heading: float = 0):
+                 initial_heading: float = 0,
+                 record_history: bool = False,
+                 history_capacity: int = 1024):
         # Constants
-        self.MAX_BANK_ANGLE = np.radians(30)  # 30 degrees max bank
-        self.BANK_RATE = np.radians(15)       # 15 degrees per second
+        self.MAX_BANK_ANGLE = math.radians(30)  # 30 degrees max bank
+        self.BANK_RATE = math.radians(15)       # 15 degrees per second
         self.MAX_G_FORCE = 2.0                # Maximum g-force in turns
         self.NM_TO_METERS = 1852              # Conversion factor
+        self._KNOTS_TO_MPS = self.NM_TO_METERS / 3600.0
         
         # Initial state
         self.state = AircraftState(
-            position=initial_position,
+            position=np.array(initial_position, dtype=float),
             heading=initial_heading,
             speed=0,
             bank_angle=0
         )
         
-        # Flight path history for visualization
-        self.path_history: List[Tuple[float, float]] = [initial_position]
+        # Flight path history for visualization (opt-in, stored in a growable (N, 2) buffer)
+        self._record_history = record_history
+        self._history = np.empty((history_capacity, 2)) if record_history else None
+        self._history_len = 0
+        if record_history:
+            self._append_history(initial_position)
+
+    @property
+    def path_history(self) -> np.ndarray:
+        """Recorded (x, y) positions as an (N, 2) array; empty unless record_history=True"""
+        if self._history is None:
+            return np.empty((0, 2))
+        return self._history[:self._history_len]
+
+    def _append_history(self, position: Tuple[float, float]):
+        """Write a position at the history cursor, doubling the buffer when full"""
+        if self._history_len == len(self._history):
+            self._history = np.concatenate([self._history, np.empty_like(self._history)])
+        self._history[self._history_len] = position
+        self._history_len += 1
 
     def update(self, dt: float, target_heading: float, target_speed_knots: float):
         """
@@ -40,11 +66,11 @@ class Aircraft:
             target_speed_knots: Desired speed in knots
         """
         # Convert target speed to m/s
-        target_speed = target_speed_knots * self.NM_TO_METERS / 3600
+        target_speed = target_speed_knots * self._KNOTS_TO_MPS
         
         # Update speed (simple acceleration model)
         speed_diff = target_speed - self.state.speed
-        acceleration = np.clip(speed_diff, -5, 5)  # 5 m/s^2 max acceleration
+        acceleration = _clip(speed_diff, -5, 5)  # 5 m/s^2 max acceleration
         self.state.speed += acceleration * dt
         
         # Calculate desired heading change
@@ -52,19 +78,19 @@ class Aircraft:
         
         # Update bank angle
         if abs(heading_diff) > 0.01:  # If we need to turn
-            target_bank = np.clip(heading_diff, -self.MAX_BANK_ANGLE, self.MAX_BANK_ANGLE)
+            target_bank = _clip(heading_diff, -self.MAX_BANK_ANGLE, self.MAX_BANK_ANGLE)
             bank_diff = target_bank - self.state.bank_angle
-            bank_change = np.clip(bank_diff, -self.BANK_RATE * dt, self.BANK_RATE * dt)
+            bank_change = _clip(bank_diff, -self.BANK_RATE * dt, self.BANK_RATE * dt)
             self.state.bank_angle += bank_change
         else:
             # Return to level flight
-            self.state.bank_angle = np.clip(self.state.bank_angle * 0.9, -0.01, 0.01)
+            self.state.bank_angle = _clip(self.state.bank_angle * 0.9, -0.01, 0.01)
         
         # Calculate turn rate based on bank angle and speed
         if self.state.speed > 0:
             # Turn radius = v^2 / (g * tan(bank_angle))
             g = 9.81  # m/s^2
-            turn_rate = (g * np.tan(self.state.bank_angle) / 
+            turn_rate = (g * math.tan(self.state.bank_angle) / 
                         max(self.state.speed, 1))  # radians per second
             self.state.heading += turn_rate * dt
         
@@ -72,34 +98,34 @@ class Aircraft:
         self.state.heading = self.normalize_angle(self.state.heading)
         
         # Update position
-        dx = self.state.speed * np.cos(self.state.heading) * dt
-        dy = self.state.speed * np.sin(self.state.heading) * dt
-        new_position = (
-            self.state.position[0] + dx,
-            self.state.position[1] + dy
-        )
-        self.state.position = new_position
-        self.path_history.append(new_position)
+        dx = self.state.speed * math.cos(self.state.heading) * dt
+        dy = self.state.speed * math.sin(self.state.heading) * dt
+        position = self.state.position
+        position[0] += dx
+        position[1] += dy
+        if self._record_history:
+            self._append_history(position)
 
     def get_turn_radius(self, speed_knots: float) -> float:
         """Calculate minimum turn radius in meters at given speed"""
-        speed_mps = speed_knots * self.NM_TO_METERS / 3600
+        speed_mps = speed_knots * self._KNOTS_TO_MPS
         g = 9.81  # m/s^2
-        return (speed_mps ** 2) / (g * np.tan(self.MAX_BANK_ANGLE))
+        return (speed_mps ** 2) / (g * math.tan(self.MAX_BANK_ANGLE))
 
     @staticmethod
     def normalize_angle(angle: float) -> float:
         """Normalize angle to [-π, π]"""
-        return ((angle + np.pi) % (2 * np.pi)) - np.pi
+        # IEEE remainder already lands in [-π, π] in a single libm call
+        return math.remainder(angle, math.tau)
 
     def calculate_intercept_course(self, target: Tuple[float, float]) -> float:
         """Calculate heading needed to intercept target"""
         dx = target[0] - self.state.position[0]
         dy = target[1] - self.state.position[1]
-        return np.arctan2(dy, dx)
+        return math.atan2(dy, dx)
 
     def distance_to_target(self, target: Tuple[float, float]) -> float:
         """Calculate straight-line distance to target in meters"""
         dx = target[0] - self.state.position[0]
         dy = target[1] - self.state.position[1]
-        return np.sqrt(dx**2 + dy**2) 
\ No newline at end of file
+        return math.hypot(dx, dy) 
\ No newline at end of file
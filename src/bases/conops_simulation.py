@@ -1,12 +1,14 @@
+# Scalar math goes through the math module; NumPy is reserved for whole-array operations
+import math
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import imageio
 from matplotlib.patches import Circle, PathPatch
 from matplotlib.path import Path
 import matplotlib.colors as colors
-from typing import List, Tuple, Dict
-from dataclasses import dataclass
-import random
+from typing import List, Tuple, Dict, Optional
+from dataclasses import dataclass, field
+from kernels import USE_NUMBA, ROUTE_LEN, patrol_step, intercept_step, circle_step, rtb_step
 
 @dataclass(frozen=True)  # Make the dataclass immutable and hashable
 class Base:
@@ -14,59 +16,121 @@ class Base:
     position: Tuple[float, float]
     type: str  # 'MOB' or 'FOB'
     range_nm: float = 6.03
+    # Index into ConOpsSimulation.bases; identifies the base, so it must always be given
+    base_id: int = field(kw_only=True)
 
     def __hash__(self):
-        return hash((self.name, self.position, self.type, self.range_nm))
+        return self.base_id
     
     def __eq__(self, other):
         if not isinstance(other, Base):
             return NotImplemented
-        return (self.name == other.name and 
-                self.position == other.position and 
-                self.type == other.type and 
-                self.range_nm == other.range_nm)
+        return self.base_id == other.base_id
 
-@dataclass
-class Aircraft:
-    position: Tuple[float, float]
-    heading: float
-    base: Base
-    state: str  # 'patrol', 'intercept', 'circle', 'rtb'
-    patrol_points: List[Tuple[float, float]] = None
-    patrol_index: int = 0
-    fireballs_dropped: int = 0  # Add counter for fireballs
-    last_fireball_time: float = 0  # Track time of last fireball drop
+# Integer state ids used by the fleet arrays
+STATE_PATROL = 0
+STATE_INTERCEPT = 1
+STATE_CIRCLE = 2
+STATE_RTB = 3
+STATE_NAMES = ('patrol', 'intercept', 'circle', 'rtb')
+# RGBA marker color for each state id
+COLOR_LUT = colors.to_rgba_array(['blue', 'red', 'orange', 'gray'])
+
+# Fireball timing is kept in integer ticks of simulation time
+TICK_SECONDS = 0.1
+FIREBALL_INTERVAL_TICKS = 300  # 30 seconds between drops
+
+class FleetSOA:
+    """Aircraft fleet stored as parallel NumPy arrays (one entry per aircraft)"""
 
-class ConOpsSimulation:
     def __init__(self):
+        self.pos_x = np.empty(0)
+        self.pos_y = np.empty(0)
+        self.heading = np.empty(0)
+        self.state_id = np.empty(0, dtype=np.int8)
+        self.base_idx = np.empty(0, dtype=np.int8)
+        self.route_id = np.empty(0, dtype=np.int8)  # -1 for aircraft without a patrol route
+        self.patrol_index = np.empty(0, dtype=np.int64)
+        self.fireballs_dropped = np.empty(0, dtype=np.int64)
+        self.next_drop_tick = np.empty(0, dtype=np.int64)
+        self.circle_time = np.empty(0)
+
+    def __len__(self) -> int:
+        return len(self.pos_x)
+
+    def append(self, position: Tuple[float, float], heading: float, base_idx: int,
+               state_id: int, route_id: int = -1, patrol_index: int = 0):
+        """Add one aircraft to the end of the fleet"""
+        self.pos_x = np.append(self.pos_x, position[0])
+        self.pos_y = np.append(self.pos_y, position[1])
+        self.heading = np.append(self.heading, heading)
+        self.state_id = np.append(self.state_id, np.int8(state_id))
+        self.base_idx = np.append(self.base_idx, np.int8(base_idx))
+        self.route_id = np.append(self.route_id, np.int8(route_id))
+        self.patrol_index = np.append(self.patrol_index, patrol_index)
+        self.fireballs_dropped = np.append(self.fireballs_dropped, 0)
+        # First drop is due 30 seconds after the clock starts
+        self.next_drop_tick = np.append(self.next_drop_tick, FIREBALL_INTERVAL_TICKS)
+        self.circle_time = np.append(self.circle_time, 0.0)
+
+    def compact(self, keep: np.ndarray) -> np.ndarray:
+        """
+        Drop every aircraft whose entry in the boolean `keep` mask is False.
+        Returns the new index of each old entry (only meaningful where `keep` is True).
+        """
+        self.pos_x = self.pos_x[keep]
+        self.pos_y = self.pos_y[keep]
+        self.heading = self.heading[keep]
+        self.state_id = self.state_id[keep]
+        self.base_idx = self.base_idx[keep]
+        self.route_id = self.route_id[keep]
+        self.patrol_index = self.patrol_index[keep]
+        self.fireballs_dropped = self.fireballs_dropped[keep]
+        self.next_drop_tick = self.next_drop_tick[keep]
+        self.circle_time = self.circle_time[keep]
+        return np.cumsum(keep) - 1
+
+class ConOpsSimulation:
+    def __init__(self, seed: Optional[int] = None):
         self.AREA_SIZE_NM = 17.07
         self.NM_TO_KM = 1.852
         self.AIRCRAFT_SPEED_KTS = 76  # Updated to 76 knots for payload aircraft
         self.PATROL_SPEED_KTS = 60    # Keep patrol speed at 60 knots
         self.TURN_RADIUS_NM = 0.5
+        self.FIRE_RADIUS_NM = 5.0  # Fires start within this radius of the area center
+        self._rng = np.random.default_rng(seed)
+
+        # Squared distance thresholds, compared against dx*dx + dy*dy so no sqrt is needed
+        self.WAYPOINT_RADIUS_SQ = 0.05 ** 2  # Patrol waypoint reached
+        self.LANDING_RADIUS_SQ = 0.1 ** 2    # Returning aircraft has landed
+        self.TURN_RADIUS_SQ = self.TURN_RADIUS_NM ** 2
         
         # Initialize bases
         center = self.AREA_SIZE_NM / 2
         offset = 5  # Distance from center to FOBs
         
         self.bases = [
-            Base('MOB', (center, center), 'MOB'),
-            Base('FOB 1', (center + offset, center + offset), 'FOB'),
-            Base('FOB 2', (center + offset, center - offset), 'FOB'),
-            Base('FOB 3', (center - offset, center - offset), 'FOB'),
-            Base('FOB 4', (center - offset, center + offset), 'FOB')
+            Base('MOB', (center, center), 'MOB', base_id=0),
+            Base('FOB 1', (center + offset, center + offset), 'FOB', base_id=1),
+            Base('FOB 2', (center + offset, center - offset), 'FOB', base_id=2),
+            Base('FOB 3', (center - offset, center - offset), 'FOB', base_id=3),
+            Base('FOB 4', (center - offset, center + offset), 'FOB', base_id=4)
         ]
+        # Base coordinates indexed by base_id, gathered by the fleet's base_idx
+        self._base_pos_x = np.array([base.position[0] for base in self.bases])
+        self._base_pos_y = np.array([base.position[1] for base in self.bases])
         
         # Initialize aircraft at bases
-        self.aircraft = []
+        self.aircraft = FleetSOA()
         self.setup_patrol_routes()
         
         # Simulation state
         self.fire_location = None
+        self.first_responder = -1  # Fleet index of the first responder
         self.elapsed_time = 0
         self.phase = 'patrol'  # patrol, response, mass_response
         
-    def generate_patrol_route(self) -> List[Tuple[float, float]]:
+    def generate_patrol_route(self) -> np.ndarray:
         """
         Generate a rectangular racetrack search pattern, traversed clockwise.
 
@@ -83,24 +147,21 @@ class ConOpsSimulation:
         top_y = 14.7
         num_points = 50  # points along each edge for smoothness
 
-        route_points = []
-        # Left edge (from bottom to top) – flying north
-        for y in np.linspace(bottom_y, top_y, num_points):
-            route_points.append((left_x, y))
-        # Top edge (from left to right) – flying east
-        for x in np.linspace(left_x, right_x, num_points):
-            route_points.append((x, top_y))
-        # Right edge (from top to bottom) – flying south
-        for y in np.linspace(top_y, bottom_y, num_points):
-            route_points.append((right_x, y))
-        # Bottom edge (from right to left) – flying west
-        for x in np.linspace(right_x, left_x, num_points):
-            route_points.append((x, bottom_y))
-
-        return route_points
+        # Each edge is one vectorized segment, assembled into an (N, 2) array
+        segments = [
+            # Left edge (from bottom to top) – flying north
+            np.column_stack([np.full(num_points, left_x), np.linspace(bottom_y, top_y, num_points)]),
+            # Top edge (from left to right) – flying east
+            np.column_stack([np.linspace(left_x, right_x, num_points), np.full(num_points, top_y)]),
+            # Right edge (from top to bottom) – flying south
+            np.column_stack([np.full(num_points, right_x), np.linspace(top_y, bottom_y, num_points)]),
+            # Bottom edge (from right to left) – flying west
+            np.column_stack([np.linspace(right_x, left_x, num_points), np.full(num_points, bottom_y)]),
+        ]
+        return np.concatenate(segments, axis=0)
 
     def generate_rounded_racetrack_route(self, center: Tuple[float, float], width: float, height: float, 
-                                           corner_radius: float, p_straight: int = 20, p_arc: int = 10) -> List[Tuple[float, float]]:
+                                           corner_radius: float, p_straight: int = 20, p_arc: int = 10) -> np.ndarray:
         """
         Generate a rounded racetrack route (rounded rectangle) in clockwise order.
 
@@ -121,7 +182,7 @@ class ConOpsSimulation:
         :param corner_radius: Radius for rounding the corners.
         :param p_straight: Number of points for each straight segment.
         :param p_arc: Number of points for each arc segment.
-        :return: List of (x, y) points representing the route.
+        :return: (4 * p_straight + 4 * p_arc, 2) array of (x, y) points representing the route.
         """
         cx, cy = center
         x_min = cx - width / 2
@@ -130,100 +191,73 @@ class ConOpsSimulation:
         y_max = cy + height / 2
         r = corner_radius
 
-        route = []
+        route = np.empty((4 * p_straight + 4 * p_arc, 2))
+        idx = 0
 
-        # 1. Top edge: from (x_min + r, y_max) to (x_max - r, y_max)
-        top_edge = [(x, y_max) for x in np.linspace(x_min + r, x_max - r, p_straight)]
-        route.extend(top_edge)
+        def add_straight(x0, y0, x1, y1):
+            nonlocal idx
+            route[idx:idx + p_straight, 0] = np.linspace(x0, x1, p_straight)
+            route[idx:idx + p_straight, 1] = np.linspace(y0, y1, p_straight)
+            idx += p_straight
 
-        # 2. Top-right corner: arc with center at (x_max - r, y_max - r)
-        center_tr = (x_max - r, y_max - r)
-        angles_tr = np.linspace(np.pi/2, 0, p_arc, endpoint=False)
-        arc_tr = [(center_tr[0] + r * np.cos(theta), center_tr[1] + r * np.sin(theta)) for theta in angles_tr]
-        route.extend(arc_tr)
+        def add_arc(arc_cx, arc_cy, start, stop):
+            nonlocal idx
+            angles = np.linspace(start, stop, p_arc, endpoint=False)
+            route[idx:idx + p_arc, 0] = arc_cx + r * np.cos(angles)
+            route[idx:idx + p_arc, 1] = arc_cy + r * np.sin(angles)
+            idx += p_arc
 
+        # 1. Top edge: from (x_min + r, y_max) to (x_max - r, y_max)
+        add_straight(x_min + r, y_max, x_max - r, y_max)
+        # 2. Top-right corner: arc with center at (x_max - r, y_max - r)
+        add_arc(x_max - r, y_max - r, np.pi/2, 0)
         # 3. Right edge: from (x_max, y_max - r) down to (x_max, y_min + r)
-        right_edge = [(x_max, y) for y in np.linspace(y_max - r, y_min + r, p_straight)]
-        route.extend(right_edge)
-
+        add_straight(x_max, y_max - r, x_max, y_min + r)
         # 4. Bottom-right corner: arc with center at (x_max - r, y_min + r)
-        center_br = (x_max - r, y_min + r)
-        angles_br = np.linspace(0, -np.pi/2, p_arc, endpoint=False)
-        arc_br = [(center_br[0] + r * np.cos(theta), center_br[1] + r * np.sin(theta)) for theta in angles_br]
-        route.extend(arc_br)
-
+        add_arc(x_max - r, y_min + r, 0, -np.pi/2)
         # 5. Bottom edge: from (x_max - r, y_min) to (x_min + r, y_min)
-        bottom_edge = [(x, y_min) for x in np.linspace(x_max - r, x_min + r, p_straight)]
-        route.extend(bottom_edge)
-
+        add_straight(x_max - r, y_min, x_min + r, y_min)
         # 6. Bottom-left corner: arc with center at (x_min + r, y_min + r)
-        center_bl = (x_min + r, y_min + r)
-        angles_bl = np.linspace(-np.pi/2, -np.pi, p_arc, endpoint=False)
-        arc_bl = [(center_bl[0] + r * np.cos(theta), center_bl[1] + r * np.sin(theta)) for theta in angles_bl]
-        route.extend(arc_bl)
-
+        add_arc(x_min + r, y_min + r, -np.pi/2, -np.pi)
         # 7. Left edge: from (x_min, y_min + r) up to (x_min, y_max - r)
-        left_edge = [(x_min, y) for y in np.linspace(y_min + r, y_max - r, p_straight)]
-        route.extend(left_edge)
-
+        add_straight(x_min, y_min + r, x_min, y_max - r)
         # 8. Top-left corner: arc with center at (x_min + r, y_max - r)
-        center_tl = (x_min + r, y_max - r)
-        angles_tl = np.linspace(np.pi, np.pi/2, p_arc, endpoint=False)
-        arc_tl = [(center_tl[0] + r * np.cos(theta), center_tl[1] + r * np.sin(theta)) for theta in angles_tl]
-        route.extend(arc_tl)
+        add_arc(x_min + r, y_max - r, np.pi, np.pi/2)
 
         return route
 
-    def get_evenly_spaced_points(self, route: List[Tuple[float, float]], num_points: int) -> List[Tuple[float, float]]:
+    def get_evenly_spaced_points(self, route: np.ndarray, num_points: int) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Given a route (list of (x,y) points forming a closed loop), re-sample and return `num_points`
+        Given a route ((M, 2) array of points forming a closed loop), re-sample `num_points`
         uniformly spaced along the entire perimeter.
+
+        Returns the (num_points, 2) array of points and, for each point, the index of the
+        nearest vertex of `route` (the segment lookup already brackets it).
         """
+        route = np.asarray(route, dtype=float)
         # Ensure the route is a closed loop.
-        if route[0] != route[-1]:
-            closed_route = route + [route[0]]
+        if not np.array_equal(route[0], route[-1]):
+            closed_route = np.vstack([route, route[:1]])
         else:
             closed_route = route
 
         # Compute cumulative distances along the closed route.
-        cum_dist = [0.0]
-        for i in range(1, len(closed_route)):
-            dx = closed_route[i][0] - closed_route[i - 1][0]
-            dy = closed_route[i][1] - closed_route[i - 1][1]
-            cum_dist.append(cum_dist[-1] + np.hypot(dx, dy))
-        total_length = cum_dist[-1]
-        spacing = total_length / num_points
-
-        uniform_points = []
-        seg = 0
-        for i in range(num_points):
-            target = i * spacing
-            # Advance the segment until the target is less than the next cumulative distance.
-            while seg < len(cum_dist) - 1 and cum_dist[seg + 1] < target:
-                seg += 1
-            # Linear interpolation for the target point.
-            seg_length = cum_dist[seg + 1] - cum_dist[seg]
-            if seg_length == 0:
-                t = 0
-            else:
-                t = (target - cum_dist[seg]) / seg_length
-            x = closed_route[seg][0] + t * (closed_route[seg + 1][0] - closed_route[seg][0])
-            y = closed_route[seg][1] + t * (closed_route[seg + 1][1] - closed_route[seg][1])
-            uniform_points.append((x, y))
-        return uniform_points
-
-    def find_nearest_index(self, route: List[Tuple[float, float]], point: Tuple[float, float]) -> int:
-        """
-        Return the index of the point in `route` that is closest to the given `point`.
-        """
-        best_idx = 0
-        best_dist = float('inf')
-        for i, pt in enumerate(route):
-            dist = self.calculate_distance(pt, point)
-            if dist < best_dist:
-                best_dist = dist
-                best_idx = i
-        return best_idx
+        seg_lengths = np.hypot(np.diff(closed_route[:, 0]), np.diff(closed_route[:, 1]))
+        cum_dist = np.concatenate(([0.0], np.cumsum(seg_lengths)))
+        targets = np.arange(num_points) * (cum_dist[-1] / num_points)
+
+        # First segment whose end lies at or beyond each target.
+        seg = np.clip(np.searchsorted(cum_dist, targets, side='left') - 1, 0, len(seg_lengths) - 1)
+
+        # Linear interpolation for the target points.
+        seg_length = seg_lengths[seg]
+        t = np.divide(targets - cum_dist[seg], seg_length,
+                      out=np.zeros_like(targets), where=seg_length != 0)
+        points = closed_route[seg] + t[:, None] * (closed_route[seg + 1] - closed_route[seg])
+
+        # Each point lies on its segment, so the nearer end is whichever side of t = 0.5 it falls
+        nearest = (seg + (t > 0.5)) % len(route)
+        return points, nearest
 
     def setup_patrol_routes(self):
         """
@@ -234,7 +268,7 @@ class ConOpsSimulation:
         and their heading is initialized based on the direction toward the next evenly
         spaced point.
         """
-        self.aircraft = []
+        self.aircraft = FleetSOA()
         num_aircraft_per_route = 8
 
         # Overall simulation center and offset from the __init__ parameters.
@@ -254,167 +288,211 @@ class ConOpsSimulation:
         left_route = self.generate_rounded_racetrack_route(left_center, route_width, route_height, corner_radius)
         right_route = self.generate_rounded_racetrack_route(right_center, route_width, route_height, corner_radius)
 
-        # Determine the FOBs for each route.
-        left_fobs = [base for base in self.bases if base.name in ['FOB 3', 'FOB 4']]
-        right_fobs = [base for base in self.bases if base.name in ['FOB 1', 'FOB 2']]
+        # Stack both routes into a (2, ROUTE_LEN, 2) array so patrol targets can be
+        # gathered by (route_id, patrol_index).
+        assert len(left_route) == len(right_route) == ROUTE_LEN
+        self.routes = np.stack([left_route, right_route])
+        # (2, N) x/y rows of each route, reused every frame when drawing
+        self._left_route_xy = self.routes[0].T.copy()
+        self._right_route_xy = self.routes[1].T.copy()
+
+        # Determine the FOBs (as indices into self.bases) for each route.
+        left_fobs = [base.base_id for base in self.bases if base.name in ['FOB 3', 'FOB 4']]
+        right_fobs = [base.base_id for base in self.bases if base.name in ['FOB 1', 'FOB 2']]
 
-        # Get 8 evenly spaced starting positions along the full perimeter for each route.
-        uniform_left_points = self.get_evenly_spaced_points(left_route, num_aircraft_per_route)
-        uniform_right_points = self.get_evenly_spaced_points(right_route, num_aircraft_per_route)
+        routes_and_fobs = [(left_route, left_fobs), (right_route, right_fobs)]
+        for route_id, (route, fobs) in enumerate(routes_and_fobs):
+            # Get 8 evenly spaced starting positions along the full perimeter, along with
+            # the nearest index in the detailed route for robust heading determination.
+            positions, patrol_indices = self.get_evenly_spaced_points(route, num_aircraft_per_route)
 
-        # Initialize aircraft for the left route.
-        for i, pos in enumerate(uniform_left_points):
-            # For robust heading determination, find the nearest index in the detailed route.
-            patrol_index = self.find_nearest_index(left_route, pos)
             # Next target: use the next point in the detailed route (cyclically).
-            next_index = (patrol_index + 1) % len(left_route)
-            dx = left_route[next_index][0] - left_route[patrol_index][0]
-            dy = left_route[next_index][1] - left_route[patrol_index][1]
-            heading = np.arctan2(dy, dx)
-            base = left_fobs[i % len(left_fobs)]
-            self.aircraft.append(Aircraft(
-                position=pos,
-                heading=heading,
-                base=base,
-                state='patrol',
-                patrol_points=left_route,
-                patrol_index=patrol_index
-            ))
-
-        # Initialize aircraft for the right route.
-        for i, pos in enumerate(uniform_right_points):
-            patrol_index = self.find_nearest_index(right_route, pos)
-            next_index = (patrol_index + 1) % len(right_route)
-            dx = right_route[next_index][0] - right_route[patrol_index][0]
-            dy = right_route[next_index][1] - right_route[patrol_index][1]
-            heading = np.arctan2(dy, dx)
-            base = right_fobs[i % len(right_fobs)]
-            self.aircraft.append(Aircraft(
-                position=pos,
-                heading=heading,
-                base=base,
-                state='patrol',
-                patrol_points=right_route,
-                patrol_index=patrol_index
-            ))
+            next_indices = (patrol_indices + 1) % len(route)
+            delta = route[next_indices] - route[patrol_indices]
+            headings = np.arctan2(delta[:, 1], delta[:, 0])
 
-    def generate_fire(self):
-        """Generate random fire location near center of area"""
+            for i in range(num_aircraft_per_route):
+                self.aircraft.append(positions[i], headings[i], fobs[i % len(fobs)], STATE_PATROL,
+                                     route_id=route_id, patrol_index=int(patrol_indices[i]))
+
+    def generate_fire_batch(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sample `n` fire locations uniformly over the disc around the center of the area"""
         center = self.AREA_SIZE_NM / 2
-        radius = 5.0  # 5 NM radius from center
         
-        # Generate random angle and distance within radius
-        angle = random.uniform(0, 2 * np.pi)
-        distance = random.uniform(0, radius)
+        # Generate random angles and distances within radius
+        # (sqrt of a uniform draw gives a uniform density over the disc's area)
+        angles = self._rng.uniform(0, 2 * np.pi, size=n)
+        distances = self.FIRE_RADIUS_NM * np.sqrt(self._rng.uniform(0, 1, size=n))
         
         # Convert to cartesian coordinates
-        x = center + distance * np.cos(angle)
-        y = center + distance * np.sin(angle)
+        return center + distances * np.cos(angles), center + distances * np.sin(angles)
+
+    def generate_fire(self):
+        """Generate random fire location near center of area"""
+        xs, ys = self.generate_fire_batch(1)
+        x, y = float(xs[0]), float(ys[0])
         
         self.fire_location = (x, y)
         self.phase = 'response'
         self.elapsed_time = 0  # Reset clock when fire starts
         
-        # Store the first responder for reference
-        closest_aircraft = min(self.aircraft, 
-                             key=lambda a: self.calculate_distance(a.position, self.fire_location))
-        closest_aircraft.state = 'intercept'
-        self.first_responder = closest_aircraft
+        # Store the first responder (fleet index) for reference
+        fleet = self.aircraft
+        dx = fleet.pos_x - x
+        dy = fleet.pos_y - y
+        self.first_responder = int(np.argmin(dx*dx + dy*dy))
+        fleet.state_id[self.first_responder] = STATE_INTERCEPT
+
+    def _sq_distance(self, point1: Tuple[float, float], point2: Tuple[float, float]) -> float:
+        """Squared straight-line distance between two points, for comparing against squared radii"""
+        dx = point2[0] - point1[0]
+        dy = point2[1] - point1[1]
+        return dx*dx + dy*dy
 
     def calculate_distance(self, point1: Tuple[float, float], point2: Tuple[float, float]) -> float:
         """Calculate straight-line distance between two points"""
-        return np.sqrt((point2[0] - point1[0])**2 + (point2[1] - point1[1])**2)
+        return math.sqrt(self._sq_distance(point1, point2))
+
+    def current_tick(self) -> int:
+        """Elapsed simulation time as a whole number of ticks"""
+        return int(round(self.elapsed_time / TICK_SECONDS))
 
     def update_aircraft(self, dt: float):
         """
         Update aircraft positions and states.
-        (For brevity, only the revised patrol branch is shown here.)
+        Each state is advanced as one vectorized block over the fleet arrays.
         """
-        for aircraft in self.aircraft:
-            if aircraft.state == 'patrol':
-                # Follow the patrol (racetrack) route in order
-                target = aircraft.patrol_points[aircraft.patrol_index]
-                if self.calculate_distance(aircraft.position, target) < 0.05:
-                    # Once close enough, increment to the next point (wrap around)
-                    aircraft.patrol_index = (aircraft.patrol_index + 1) % len(aircraft.patrol_points)
-                    target = aircraft.patrol_points[aircraft.patrol_index]
-
-                # Compute heading and move towards the target
-                dx = target[0] - aircraft.position[0]
-                dy = target[1] - aircraft.position[1]
-                heading = np.arctan2(dy, dx)
-                speed = self.PATROL_SPEED_KTS * dt / 3600.0  # Convert knots to NM per dt
-                aircraft.position = (
-                    aircraft.position[0] + speed * np.cos(heading),
-                    aircraft.position[1] + speed * np.sin(heading)
-                )
-                aircraft.heading = heading
-
-            elif aircraft.state == 'intercept':
-                # Move towards fire
-                dx = self.fire_location[0] - aircraft.position[0]
-                dy = self.fire_location[1] - aircraft.position[1]
-                dist = np.sqrt(dx**2 + dy**2)
-                
-                if dist < self.TURN_RADIUS_NM:
-                    aircraft.state = 'circle'
-                else:
-                    heading = np.arctan2(dy, dx)
-                    speed = self.AIRCRAFT_SPEED_KTS * dt / 3600
-                    
-                    aircraft.position = (
-                        aircraft.position[0] + speed * np.cos(heading),
-                        aircraft.position[1] + speed * np.sin(heading)
-                    )
-                    aircraft.heading = heading
-                    
-            elif aircraft.state == 'circle':
-                # Track time spent circling
-                if not hasattr(aircraft, 'circle_time'):
-                    aircraft.circle_time = 0
-                aircraft.circle_time += dt
-                
-                # Update fireball counter for non-first responders
-                if aircraft != self.first_responder:
-                    # Check if 30 seconds have passed since last fireball drop
-                    if self.elapsed_time - aircraft.last_fireball_time >= 30:
-                        aircraft.fireballs_dropped += 3
-                        aircraft.last_fireball_time = self.elapsed_time
-                
-                # First responder circles indefinitely, others return after 2 minutes
-                if (aircraft.circle_time >= 120 and  # 2 minutes
-                    aircraft != self.first_responder):
-                    aircraft.state = 'rtb'
-                    continue
-                
-                # Continue with normal circle behavior
-                angle = np.arctan2(aircraft.position[1] - self.fire_location[1],
-                                 aircraft.position[0] - self.fire_location[0])
-                angle += (self.AIRCRAFT_SPEED_KTS * dt / 3600) / self.TURN_RADIUS_NM
-                
-                aircraft.position = (
-                    self.fire_location[0] + self.TURN_RADIUS_NM * np.cos(angle),
-                    self.fire_location[1] + self.TURN_RADIUS_NM * np.sin(angle)
-                )
-                aircraft.heading = angle + np.pi/2
-            
-            elif aircraft.state == 'rtb':
-                # Return to base
-                dx = aircraft.base.position[0] - aircraft.position[0]
-                dy = aircraft.base.position[1] - aircraft.position[1]
-                dist = np.sqrt(dx**2 + dy**2)
-                
-                if dist < 0.1:  # If close to base, remove aircraft
-                    self.aircraft.remove(aircraft)
-                else:
-                    heading = np.arctan2(dy, dx)
-                    speed = self.AIRCRAFT_SPEED_KTS * dt / 3600
-                    
-                    aircraft.position = (
-                        aircraft.position[0] + speed * np.cos(heading),
-                        aircraft.position[1] + speed * np.sin(heading)
-                    )
-                    aircraft.heading = heading
+        fleet = self.aircraft
+        if len(fleet) == 0:
+            return
+
+        # Masks are taken once so an aircraft changing state is not advanced twice this step
+        patrol = np.flatnonzero(fleet.state_id == STATE_PATROL)
+        intercept = np.flatnonzero(fleet.state_id == STATE_INTERCEPT)
+        circle = np.flatnonzero(fleet.state_id == STATE_CIRCLE)
+        rtb = np.flatnonzero(fleet.state_id == STATE_RTB)
+        keep = np.ones(len(fleet), dtype=bool)
+
+        # Per-step constants shared by every state group
+        patrol_speed = self.PATROL_SPEED_KTS * dt / 3600.0  # Convert knots to NM per dt
+        speed = self.AIRCRAFT_SPEED_KTS * dt / 3600.0
+        angular_step = speed / self.TURN_RADIUS_NM  # Orbit angle swept per dt
+        tick = self.current_tick()
+
+        update = self._update_aircraft_jit if USE_NUMBA else self._update_aircraft_numpy
+        update(dt, patrol_speed, speed, angular_step, tick, patrol, intercept, circle, rtb, keep)
+
+        if not keep.all():
+            # Single compaction pass, then remap the first responder to its new index
+            new_index = fleet.compact(keep)
+            if self.first_responder >= 0:
+                self.first_responder = int(new_index[self.first_responder])
+
+    def _update_aircraft_jit(self, dt: float, patrol_speed: float, speed: float,
+                             angular_step: float, tick: int, patrol: np.ndarray,
+                             intercept: np.ndarray, circle: np.ndarray, rtb: np.ndarray,
+                             keep: np.ndarray):
+        """Advance each state group with the compiled kernels"""
+        fleet = self.aircraft
+        if patrol.size:
+            patrol_step(patrol, fleet.pos_x, fleet.pos_y, fleet.heading, fleet.route_id,
+                        fleet.patrol_index, self.routes, patrol_speed, self.WAYPOINT_RADIUS_SQ)
+        if intercept.size:
+            intercept_step(intercept, fleet.pos_x, fleet.pos_y, fleet.heading, fleet.state_id,
+                           self.fire_location[0], self.fire_location[1], speed, self.TURN_RADIUS_SQ)
+        if circle.size:
+            circle_step(circle, fleet.pos_x, fleet.pos_y, fleet.heading, fleet.state_id,
+                        fleet.circle_time, fleet.fireballs_dropped, fleet.next_drop_tick,
+                        self.first_responder, self.fire_location[0], self.fire_location[1],
+                        float(dt), tick, FIREBALL_INTERVAL_TICKS, angular_step,
+                        self.TURN_RADIUS_NM)
+        if rtb.size:
+            rtb_step(rtb, fleet.pos_x, fleet.pos_y, fleet.heading, fleet.base_idx,
+                     self._base_pos_x, self._base_pos_y, speed,
+                     self.LANDING_RADIUS_SQ, keep)
+
+    def _update_aircraft_numpy(self, dt: float, patrol_speed: float, speed: float,
+                               angular_step: float, tick: int, patrol: np.ndarray,
+                               intercept: np.ndarray, circle: np.ndarray, rtb: np.ndarray,
+                               keep: np.ndarray):
+        """Advance each state group with vectorized NumPy blocks (used when Numba is unavailable)"""
+        fleet = self.aircraft
+        if patrol.size:
+            # Follow the patrol (racetrack) route in order
+            route_id = fleet.route_id[patrol]
+            patrol_index = fleet.patrol_index[patrol]
+            target = self.routes[route_id, patrol_index]
+            dx = target[:, 0] - fleet.pos_x[patrol]
+            dy = target[:, 1] - fleet.pos_y[patrol]
+
+            # Once close enough, increment to the next point (wrap around)
+            advance = dx*dx + dy*dy < self.WAYPOINT_RADIUS_SQ
+            if advance.any():
+                patrol_index = np.where(advance, (patrol_index + 1) % ROUTE_LEN, patrol_index)
+                fleet.patrol_index[patrol] = patrol_index
+                target = self.routes[route_id, patrol_index]
+                dx = target[:, 0] - fleet.pos_x[patrol]
+                dy = target[:, 1] - fleet.pos_y[patrol]
+
+            # Compute heading and move towards the target
+            heading = np.arctan2(dy, dx)
+            fleet.pos_x[patrol] += patrol_speed * np.cos(heading)
+            fleet.pos_y[patrol] += patrol_speed * np.sin(heading)
+            fleet.heading[patrol] = heading
+
+        if intercept.size:
+            # Move towards fire
+            dx = self.fire_location[0] - fleet.pos_x[intercept]
+            dy = self.fire_location[1] - fleet.pos_y[intercept]
+            arrived = dx*dx + dy*dy < self.TURN_RADIUS_SQ
+            fleet.state_id[intercept[arrived]] = STATE_CIRCLE
+
+            moving = intercept[~arrived]
+            heading = np.arctan2(dy[~arrived], dx[~arrived])
+            fleet.pos_x[moving] += speed * np.cos(heading)
+            fleet.pos_y[moving] += speed * np.sin(heading)
+            fleet.heading[moving] = heading
+
+        if circle.size:
+            # Track time spent circling
+            fleet.circle_time[circle] += dt
+
+            # Update fireball counter for non-first responders
+            support = circle[circle != self.first_responder]
+            # Check if 30 seconds have passed since last fireball drop
+            due = support[fleet.next_drop_tick[support] <= tick]
+            fleet.fireballs_dropped[due] += 3
+            fleet.next_drop_tick[due] = tick + FIREBALL_INTERVAL_TICKS
+
+            # First responder circles indefinitely, others return after 2 minutes
+            done = support[fleet.circle_time[support] >= 120]
+            fleet.state_id[done] = STATE_RTB
+
+            # Continue with normal circle behavior
+            orbiting = np.setdiff1d(circle, done, assume_unique=True)
+            angle = np.arctan2(fleet.pos_y[orbiting] - self.fire_location[1],
+                               fleet.pos_x[orbiting] - self.fire_location[0])
+            angle += angular_step
+
+            fleet.pos_x[orbiting] = self.fire_location[0] + self.TURN_RADIUS_NM * np.cos(angle)
+            fleet.pos_y[orbiting] = self.fire_location[1] + self.TURN_RADIUS_NM * np.sin(angle)
+            fleet.heading[orbiting] = angle + np.pi/2
+
+        if rtb.size:
+            # Return to base
+            home = fleet.base_idx[rtb]
+            dx = self._base_pos_x[home] - fleet.pos_x[rtb]
+            dy = self._base_pos_y[home] - fleet.pos_y[rtb]
+
+            # If close to base, remove aircraft (after all states are updated)
+            landed = dx*dx + dy*dy < self.LANDING_RADIUS_SQ
+            keep[rtb[landed]] = False
+
+            moving = rtb[~landed]
+            heading = np.arctan2(dy[~landed], dx[~landed])
+            fleet.pos_x[moving] += speed * np.cos(heading)
+            fleet.pos_y[moving] += speed * np.sin(heading)
+            fleet.heading[moving] = heading
 
     def launch_mass_response(self):
         """Launch first wave of aircraft from all FOBs"""
@@ -423,12 +501,7 @@ class ConOpsSimulation:
         
         # Launch one aircraft from each FOB immediately
         for base in self.bases[1:]:  # Skip MOB
-            self.aircraft.append(Aircraft(
-                position=base.position,
-                heading=0,
-                base=base,
-                state='intercept'
-            ))
+            self.aircraft.append(base.position, 0, base.base_id, STATE_INTERCEPT)
 
     def update_mass_response(self):
         """Update mass response launches"""
@@ -438,21 +511,13 @@ class ConOpsSimulation:
             
             # Launch one aircraft from each FOB
             for base in self.bases[1:]:  # Skip MOB
-                self.aircraft.append(Aircraft(
-                    position=base.position,
-                    heading=0,
-                    base=base,
-                    state='intercept'
-                ))
+                self.aircraft.append(base.position, 0, base.base_id, STATE_INTERCEPT)
             
             self.response_launches += 1
             self.next_launch_time += 60  # Next wave in 60 seconds
 
     def animate(self, frame_num: int):
         """Animation update function"""
-        # Clear previous figure to prevent memory issues
-        plt.clf()
-        
         # Initial patrol period (5 seconds * 15 fps = 75 frames)
         if frame_num < 75:  # First 5 seconds
             dt = 1.0  # Keep aircraft moving during initial patrol
@@ -464,112 +529,138 @@ class ConOpsSimulation:
             
         # Update simulation time if not in final pause
         if frame_num < 450:  # 75 + (25*15) = 450 frames for main simulation
-            self.elapsed_time += dt
-            
-            # Mass response at 2.5 minutes (150 seconds)
-            if self.phase == 'response' and self.elapsed_time >= 150:
-                self.phase = 'mass_response'
-                self.launch_mass_response()
-            
-            # Update staggered launches
-            self.update_mass_response()
-            
-            # Update aircraft positions
-            self.update_aircraft(dt)
+            self.step(dt)
         
         # Draw current state
-        self.draw_current_state()
+        return self.draw_current_state()
 
-    def draw_current_state(self):
-        """Draw the current state of the simulation"""
-        plt.xlim(0, self.AREA_SIZE_NM)
-        plt.ylim(0, self.AREA_SIZE_NM)
-        plt.grid(True)
-
-        # Draw the two patrol routes as dashed lines.
-        # Use the same parameters as in setup_patrol_routes:
-        sim_center = self.AREA_SIZE_NM / 2
-        offset = 5  # same as in setup_patrol_routes
-        route_width = 4.27   # 4.27 nm wide
-        route_height = 14.0  # 14 nm tall
-        corner_radius = 0.5
+    def step(self, dt: float):
+        """Advance the simulation by dt seconds without drawing anything"""
+        self.elapsed_time += dt
+        
+        # Mass response at 2.5 minutes (150 seconds)
+        if self.phase == 'response' and self.elapsed_time >= 150:
+            self.phase = 'mass_response'
+            self.launch_mass_response()
+        
+        # Update staggered launches
+        self.update_mass_response()
+        
+        # Update aircraft positions
+        self.update_aircraft(dt)
 
-        left_center = (sim_center - offset, sim_center)
-        right_center = (sim_center + offset, sim_center)
-        left_route = self.generate_rounded_racetrack_route(left_center, route_width, route_height, corner_radius)
-        right_route = self.generate_rounded_racetrack_route(right_center, route_width, route_height, corner_radius)
-        left_x, left_y = zip(*left_route)
-        right_x, right_y = zip(*right_route)
-        plt.plot(left_x, left_y, 'k--', alpha=0.3)  # Dashed line for left route
-        plt.plot(right_x, right_y, 'k--', alpha=0.3)  # Dashed line for right route
+    def run_headless(self, duration: float, dt: float = 1.0,
+                     snapshot_every: int = 1) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Step the simulation for `duration` seconds with no matplotlib involvement.
+        The scenario (e.g. generate_fire) is set up by the caller beforehand.
+
+        :return: (pos_x, pos_y, heading, state_id) copies taken every `snapshot_every` steps.
+        """
+        snapshots = []
+        num_steps = int(round(duration / dt))
+        for step_num in range(num_steps):
+            self.step(dt)
+            if step_num % snapshot_every == 0:
+                fleet = self.aircraft
+                snapshots.append((fleet.pos_x.copy(), fleet.pos_y.copy(),
+                                  fleet.heading.copy(), fleet.state_id.copy()))
+        return snapshots
+
+    def setup_artists(self, ax):
+        """Draw the static scene once and create the artists updated every frame"""
+        self._ax = ax
+        ax.set_xlim(0, self.AREA_SIZE_NM)
+        ax.set_ylim(0, self.AREA_SIZE_NM)
+        ax.grid(True)
+
+        # Draw the two patrol routes (cached in setup_patrol_routes) as dashed lines.
+        ax.plot(self._left_route_xy[0], self._left_route_xy[1], 'k--', alpha=0.3)  # Dashed line for left route
+        ax.plot(self._right_route_xy[0], self._right_route_xy[1], 'k--', alpha=0.3)  # Dashed line for right route
 
         # Draw bases (without range circles)
         for base in self.bases:
-            plt.plot(base.position[0], base.position[1],
-                     'bs' if base.type == 'MOB' else 'gs', markersize=10)
+            ax.plot(base.position[0], base.position[1],
+                    'bs' if base.type == 'MOB' else 'gs', markersize=10)
+
+        # Per-frame artists: fire marker, aircraft markers, heading indicators and title
+        self._fire_marker, = ax.plot([], [], 'rx', markersize=15)
+        self._ac_scatter = ax.scatter([], [], s=36, zorder=3)
+        self._ac_quiver = None
+        self._title = ax.set_title('Initial Patrol')
+
+        ax.set_xlabel('Distance (NM)')
+        ax.set_ylabel('Distance (NM)')
+
+    def draw_current_state(self):
+        """Update the per-frame artists to the current state of the simulation"""
+        fleet = self.aircraft
+        aircraft_colors = COLOR_LUT[fleet.state_id]
 
         # Draw fire location if it exists
         if self.fire_location:
-            plt.plot(self.fire_location[0], self.fire_location[1], 'rx', markersize=15)
+            self._fire_marker.set_data([self.fire_location[0]], [self.fire_location[1]])
 
         # Draw aircraft
-        for aircraft in self.aircraft:
-            color = {
-                'patrol': 'blue',
-                'intercept': 'red',
-                'circle': 'orange',
-                'rtb': 'gray'
-            }.get(aircraft.state, 'black')
-            plt.plot(aircraft.position[0], aircraft.position[1],
-                     'o', color=color, markersize=6)
-
-            # Draw heading indicator
-            heading_length = 0.5
-            dx = heading_length * np.cos(aircraft.heading)
-            dy = heading_length * np.sin(aircraft.heading)
-            plt.arrow(aircraft.position[0], aircraft.position[1], dx, dy,
-                      head_width=0.2, head_length=0.3, fc=color, ec=color)
+        self._ac_scatter.set_offsets(np.column_stack([fleet.pos_x, fleet.pos_y]))
+        self._ac_scatter.set_color(aircraft_colors)
+
+        # Draw heading indicators; a Quiver has a fixed arrow count, so rebuild it only
+        # when aircraft are launched or land
+        heading_length = 0.5
+        u = heading_length * np.cos(fleet.heading)
+        v = heading_length * np.sin(fleet.heading)
+        if self._ac_quiver is None or self._ac_quiver.N != len(fleet):
+            if self._ac_quiver is not None:
+                self._ac_quiver.remove()
+            self._ac_quiver = self._ax.quiver(fleet.pos_x, fleet.pos_y, u, v, color=aircraft_colors,
+                                              angles='xy', scale_units='xy', scale=1,
+                                              width=0.004, zorder=3)
+        else:
+            self._ac_quiver.set_offsets(np.column_stack([fleet.pos_x, fleet.pos_y]))
+            self._ac_quiver.set_UVC(u, v)
+            self._ac_quiver.set_color(aircraft_colors)
 
         # Show timer and fireball count after fire starts
         if self.fire_location:
             minutes = int(self.elapsed_time // 60)
             seconds = int(self.elapsed_time % 60)
-            total_fireballs = sum(aircraft.fireballs_dropped for aircraft in self.aircraft)
-            plt.title(f'Mission Time: {minutes:02d}:{seconds:02d} | Total Fireballs: {total_fireballs}')
-        else:
-            plt.title('Initial Patrol')
+            total_fireballs = int(fleet.fireballs_dropped.sum())
+            self._title.set_text(f'Mission Time: {minutes:02d}:{seconds:02d} | Total Fireballs: {total_fireballs}')
 
-        plt.xlabel('Distance (NM)')
-        plt.ylabel('Distance (NM)')
+        return [self._fire_marker, self._ac_scatter, self._ac_quiver, self._title]
 
-def run_simulation():
-    """Run the simulation and save as gif"""
+def run_simulation(filename: str = 'conops_simulation.gif'):
+    """Run the simulation and save as gif (or as MP4 if filename ends in .mp4)"""
+    # Render off-screen; frames are read straight from the Agg canvas
+    plt.switch_backend('Agg')
     sim = ConOpsSimulation()
     
     # Calculate total frames:
     # 5 seconds initial + 25 seconds simulation + 5 seconds pause = 35 seconds
     # At 15 fps = 525 total frames
     total_frames = 35 * 15
+    fps = 15
     
-    # Create figure
-    fig = plt.figure(figsize=(10, 10))
-    
-    # Create animation
-    anim = FuncAnimation(
-        fig, 
-        sim.animate,
-        frames=total_frames,
-        interval=1000/15,  # 15 fps
-        repeat=False
-    )
+    # Create figure and draw the static scene once
+    fig, ax = plt.subplots(figsize=(10, 10))
+    sim.setup_artists(ax)
     
-    # Save animation
-    anim.save('conops_simulation.gif', 
-              writer='pillow', 
-              fps=15)
+    # MP4 goes through ffmpeg (needs imageio-ffmpeg) and encodes far faster than GIF
+    if filename.lower().endswith('.mp4'):
+        writer_kwargs = dict(fps=fps, macro_block_size=1)
+    else:
+        writer_kwargs = dict(mode='I', duration=1000/fps, loop=0)
+
+    # Step, draw and stream each frame to the encoder
+    with imageio.get_writer(filename, **writer_kwargs) as writer:
+        for frame_num in range(total_frames):
+            sim.animate(frame_num)
+            fig.canvas.draw()
+            writer.append_data(np.asarray(fig.canvas.buffer_rgba())[:, :, :3])
     
     # Close figure to prevent memory warning
-    plt.close()
+    plt.close(fig)
 
 if __name__ == "__main__":
-    run_simulation() 
\ No newline at end of file
+    run_simulation()
@@ -1,5 +1,13 @@
+import math
 import numpy as np
-from typing import Tuple, List
+from typing import Tuple
+from kernels import USE_NUMBA, coverage_counts
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    # SciPy is optional; coverage falls back to the tiled brute-force sweep
+    cKDTree = None
 
 class GridSystem:
     # Constants
@@ -7,11 +15,25 @@ class GridSystem:
     AREA_SIZE_NM = 17.06  # Size of area in nautical miles
     GRID_RESOLUTION = 473  # Changed to 0.5 NM resolution (1852 / 2)
     AIRCRAFT_SPEED = 60  # Speed in knots
+    COVERAGE_TILE = 64  # Grid points per tile side in the coverage sweeps
     def __init__(self):
         self.area_size_meters = self.AREA_SIZE_NM * self.NM_TO_METERS
         self.grid_points = int(self.area_size_meters / self.GRID_RESOLUTION)
-        self.grid = np.zeros((self.grid_points, self.grid_points))
-        self.launch_sites: List[Tuple[float, float]] = []
+        # float32 grid coordinates halve the bytes moved by the coverage sweeps
+        self._xs = np.arange(self.grid_points, dtype=np.float32) * self.GRID_RESOLUTION
+        self._ys = np.arange(self.grid_points, dtype=np.float32) * self.GRID_RESOLUTION
+
+        # Grid points flattened in [i, j] order, indexed once for range queries
+        grid_x, grid_y = np.meshgrid(self._xs, self._ys, indexing='ij')
+        self._grid_pts = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+        self._kdtree = cKDTree(self._grid_pts) if cKDTree is not None else None
+
+        # Output buffers reused by every coverage call (returned directly; do not mutate).
+        # Counts are bounded by the number of sites, so one byte per point is enough until
+        # more than 255 sites are placed (get_coverage_counts widens the buffer then)
+        self._cov_buf = np.zeros((self.grid_points, self.grid_points), dtype=np.uint8)
+        self._cov_bin = np.zeros((self.grid_points, self.grid_points), dtype=np.uint8)
+        self.launch_sites = np.empty((0, 2))  # (N, 2) site coordinates in meters
         
         # Wind conditions (16 knots in random direction)
         self.wind_speed_knots = 16.0
@@ -23,18 +45,114 @@ class GridSystem:
         self.max_range = speed_mps * remaining_time
 
     def get_coverage_counts(self) -> np.ndarray:
-        """Return matrix showing how many bases can reach each point with wind adjustment"""
-        coverage_counts = np.zeros((self.grid_points, self.grid_points))
-        
-        for i in range(self.grid_points):
-            for j in range(self.grid_points):
-                point = (i * self.GRID_RESOLUTION, j * self.GRID_RESOLUTION)
-                for site in self.launch_sites:
-                    wind_adjusted_dist = self.calculate_wind_adjusted_distance(site, point)
-                    if wind_adjusted_dist <= self.max_range:
-                        coverage_counts[i, j] += 1
-        
-        return coverage_counts
+        """
+        Return matrix showing how many bases can reach each point with wind adjustment.
+        The result is a buffer reused by the next call, so copy it before keeping or mutating it.
+        """
+        if len(self.launch_sites) == 0:
+            self._cov_buf.fill(0)
+            return self._cov_buf
+        sites = np.asarray(self.launch_sites, dtype=np.float32)
+        if len(sites) > np.iinfo(self._cov_buf.dtype).max:
+            self._cov_buf = self._cov_buf.astype(np.uint16)
+        if USE_NUMBA:
+            return self._coverage_numba(sites)
+        if self._kdtree is None:
+            return self._coverage_tiled(sites, self.COVERAGE_TILE)
+        return self._coverage_kdtree(sites)
+
+    def _coverage_numba(self, sites: np.ndarray) -> np.ndarray:
+        """Count sites within wind-adjusted range of each grid point with the parallel Numba kernel"""
+        speed_mps = self.AIRCRAFT_SPEED * self.NM_TO_METERS / 3600
+        wind_mps = self.wind_speed_knots * self.NM_TO_METERS / 3600
+        coverage_counts(self._xs, self._ys, sites, self.max_range, speed_mps, wind_mps,
+                        math.cos(self.wind_direction), math.sin(self.wind_direction), self._cov_buf)
+        return self._cov_buf
+
+    def _coverage_kdtree(self, sites: np.ndarray) -> np.ndarray:
+        """Count sites within wind-adjusted range of each grid point using KD-tree range queries"""
+        counts = self._cov_buf.reshape(-1)  # Flat view in grid point order
+        counts.fill(0)
+
+        # Wind stretches a site's reach to at most max_range * (speed + wind) / speed, so
+        # query that disc (padded for float32 rounding) and filter the candidates exactly
+        reach = self.max_range * (1 + self.wind_speed_knots / self.AIRCRAFT_SPEED) * 1.001
+        candidates = self._kdtree.query_ball_point(sites, reach)
+
+        for (sx, sy), idx in zip(sites, candidates):
+            idx = np.asarray(idx, dtype=np.intp)
+            pts = self._grid_pts[idx]
+            counts[idx[self._within_wind_range(pts[:, 0] - sx, pts[:, 1] - sy)]] += 1
+
+        return self._cov_buf
+
+    def _coverage_tiled(self, sites: np.ndarray, tile: int) -> np.ndarray:
+        """Count sites within wind-adjusted range of each grid point, one tile at a time"""
+        counts = self._cov_buf  # Every tile is assigned below, so no fill is needed
+
+        for i0 in range(0, self.grid_points, tile):
+            # Offsets from every site to this tile's grid columns (x): (S, tile)
+            dx = self._xs[None, i0:i0 + tile] - sites[:, 0, None]
+            for j0 in range(0, self.grid_points, tile):
+                dy = self._ys[None, j0:j0 + tile] - sites[:, 1, None]
+                reachable = self._within_wind_range(dx[:, :, None], dy[:, None, :])
+                counts[i0:i0 + tile, j0:j0 + tile] = np.count_nonzero(reachable, axis=0)
+
+        return counts
+
+    def update_coverage_counts(self, counts: np.ndarray, removed_sites: np.ndarray,
+                               added_sites: np.ndarray) -> np.ndarray:
+        """
+        Update counts in place for sites moved from removed_sites to added_sites, touching only
+        the grid window each site can reach instead of recounting every site. counts must be
+        a caller-owned copy of get_coverage_counts() for the sites before the move.
+        """
+        for site in np.asarray(removed_sites, dtype=np.float32).reshape(-1, 2):
+            rows, cols, reach = self._site_reach(site)
+            window = counts[rows, cols]
+            window -= np.minimum(window, reach)  # Clamped so a boundary disagreement cannot wrap
+        for site in np.asarray(added_sites, dtype=np.float32).reshape(-1, 2):
+            rows, cols, reach = self._site_reach(site)
+            counts[rows, cols] += reach
+        return counts
+
+    def _site_reach(self, site: np.ndarray) -> Tuple[slice, slice, np.ndarray]:
+        """Return the grid window around a single site and a 0/1 uint8 mask of the points it reaches"""
+        # Same padded bounding disc as the KD-tree query, snapped to grid indices
+        reach = self.max_range * (1 + self.wind_speed_knots / self.AIRCRAFT_SPEED) * 1.001
+        sx, sy = float(site[0]), float(site[1])
+        i0 = max(0, math.ceil((sx - reach) / self.GRID_RESOLUTION))
+        i1 = min(self.grid_points, math.floor((sx + reach) / self.GRID_RESOLUTION) + 1)
+        j0 = max(0, math.ceil((sy - reach) / self.GRID_RESOLUTION))
+        j1 = min(self.grid_points, math.floor((sy + reach) / self.GRID_RESOLUTION) + 1)
+        rows, cols = slice(i0, max(i0, i1)), slice(j0, max(j0, j1))
+
+        # Evaluate with the same predicate as the full sweep so the increments match it exactly
+        if USE_NUMBA:
+            mask = np.empty((rows.stop - rows.start, cols.stop - cols.start), dtype=np.uint8)
+            speed_mps = self.AIRCRAFT_SPEED * self.NM_TO_METERS / 3600
+            wind_mps = self.wind_speed_knots * self.NM_TO_METERS / 3600
+            coverage_counts(self._xs[rows], self._ys[cols], site[None, :], self.max_range,
+                            speed_mps, wind_mps, math.cos(self.wind_direction),
+                            math.sin(self.wind_direction), mask)
+        else:
+            mask = self._within_wind_range(self._xs[rows, None] - site[0],
+                                           self._ys[None, cols] - site[1]).astype(np.uint8)
+        return rows, cols, mask
+
+    def _within_wind_range(self, dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+        """Vectorized `calculate_wind_adjusted_distance(site, point) <= max_range` for offsets dx, dy"""
+        speed_mps = self.AIRCRAFT_SPEED * self.NM_TO_METERS / 3600
+        wind_mps = self.wind_speed_knots * self.NM_TO_METERS / 3600
+        dist_sq = dx * dx + dy * dy
+
+        # Wind component along the track times distance, i.e. cos(relative_angle) * dist
+        # (Python float factors so float32 offsets are not promoted to float64)
+        along = dx * float(np.cos(self.wind_direction)) + dy * float(np.sin(self.wind_direction))
+
+        # dist * speed / (speed - wind * along / dist) <= max_range, multiplied through by
+        # the (positive) effective speed and dist so no arctan2 or division is needed
+        return dist_sq * speed_mps <= self.max_range * (speed_mps * np.sqrt(dist_sq) - wind_mps * along)
 
     def check_coverage_requirement(self, min_bases_required: int) -> bool:
         """Check if each point is covered by at least min_bases_required bases"""
@@ -50,14 +168,14 @@ class GridSystem:
     def add_launch_site(self, x: float, y: float) -> bool:
         """Add a launch site to the grid if it's within bounds"""
         if 0 <= x <= self.area_size_meters and 0 <= y <= self.area_size_meters:
-            self.launch_sites.append((x, y))
+            self.launch_sites = np.vstack([np.reshape(self.launch_sites, (-1, 2)), (x, y)])
             return True
         return False
     
     def calculate_distance(self, point1: Tuple[float, float], 
                          point2: Tuple[float, float]) -> float:
         """Calculate straight-line distance between two points in meters"""
-        return np.sqrt((point2[0] - point1[0])**2 + (point2[1] - point1[1])**2)
+        return math.hypot(point2[0] - point1[0], point2[1] - point1[1])
     
     def get_coverage_matrix(self, speed_knots: float, 
                           launch_time: float = 30) -> np.ndarray:
@@ -69,23 +187,52 @@ class GridSystem:
             launch_time: Launch time in seconds
         
         Returns:
-            Binary matrix where 1 indicates covered areas
+            Binary matrix where 1 indicates covered areas (a reused buffer, as
+            with get_coverage_counts)
         """
         speed_mps = speed_knots * self.NM_TO_METERS / 3600  # Convert knots to m/s
         remaining_time = 600 - launch_time  # 10 minutes - launch time in seconds
         max_distance = speed_mps * remaining_time
         
-        coverage = np.zeros((self.grid_points, self.grid_points))
-        
-        for i in range(self.grid_points):
-            for j in range(self.grid_points):
-                point = (i * self.GRID_RESOLUTION, j * self.GRID_RESOLUTION)
-                for site in self.launch_sites:
-                    if self.calculate_distance(point, site) <= max_distance:
-                        coverage[i, j] = 1
-                        break
-                        
-        return coverage 
+        if len(self.launch_sites) == 0:
+            self._cov_bin.fill(0)
+            return self._cov_bin
+        sites = np.asarray(self.launch_sites, dtype=np.float32)
+        return self._coverage_matrix_tiled(sites, max_distance**2, self.COVERAGE_TILE)
+
+    def _coverage_matrix_tiled(self, sites: np.ndarray, r2: float, tile: int) -> np.ndarray:
+        """Mark grid points within sqrt(r2) of any site, pruning whole tiles by their bounding box"""
+        coverage = self._cov_bin
+
+        for i0 in range(0, self.grid_points, tile):
+            xs = self._xs[i0:i0 + tile]
+            dx_lo = xs[0] - sites[:, 0]
+            dx_hi = xs[-1] - sites[:, 0]
+            for j0 in range(0, self.grid_points, tile):
+                ys = self._ys[j0:j0 + tile]
+                dy_lo = ys[0] - sites[:, 1]
+                dy_hi = ys[-1] - sites[:, 1]
+                block = coverage[i0:i0 + tile, j0:j0 + tile]
+
+                # A site whose range holds the tile's farthest corner covers the whole tile
+                far_sq = np.maximum(dx_lo**2, dx_hi**2) + np.maximum(dy_lo**2, dy_hi**2)
+                if np.any(far_sq <= r2):
+                    block.fill(1)
+                    continue
+
+                # Only sites whose range reaches the tile's nearest point need the per-point test
+                near_dx = np.maximum(0, np.maximum(dx_lo, -dx_hi))
+                near_dy = np.maximum(0, np.maximum(dy_lo, -dy_hi))
+                near = sites[near_dx**2 + near_dy**2 <= r2]
+                if len(near) == 0:
+                    block.fill(0)
+                    continue
+
+                dx2 = (xs[None, :] - near[:, 0, None])**2
+                dy2 = (ys[None, :] - near[:, 1, None])**2
+                block[...] = np.min(dx2[:, :, None] + dy2[:, None, :], axis=0) <= r2
+
+        return coverage
 
     def calculate_wind_adjusted_distance(self, point1: Tuple[float, float], 
                                       point2: Tuple[float, float]) -> float:
@@ -95,11 +242,11 @@ class GridSystem:
         # Calculate direction from point1 to point2
         dx = point2[0] - point1[0]
         dy = point2[1] - point1[1]
-        travel_direction = np.arctan2(dy, dx)
+        travel_direction = math.atan2(dy, dx)
         
         # Calculate wind effect based on relative angle
         relative_angle = travel_direction - self.wind_direction
-        wind_effect = np.cos(relative_angle) * self.wind_speed_knots * self.NM_TO_METERS / 3600
+        wind_effect = math.cos(relative_angle) * self.wind_speed_knots * self.NM_TO_METERS / 3600
         
         # Adjust effective ground speed
         speed_mps = self.AIRCRAFT_SPEED * self.NM_TO_METERS / 3600
@@ -109,4 +256,19 @@ class GridSystem:
         time_needed = base_distance / effective_speed
         
         # Return equivalent no-wind distance
-        return time_needed * speed_mps
\ No newline at end of file
+        return time_needed * speed_mps
+
+    def calculate_wind_adjusted_distances(self, origin: Tuple[float, float], points_x: np.ndarray,
+                                          points_y: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_wind_adjusted_distance from origin to each (points_x, points_y)"""
+        dx = np.asarray(points_x) - origin[0]
+        dy = np.asarray(points_y) - origin[1]
+        base_distance = np.hypot(dx, dy)
+        
+        # Wind component along each travel direction
+        relative_angle = np.arctan2(dy, dx) - self.wind_direction
+        wind_effect = np.cos(relative_angle) * self.wind_speed_knots * self.NM_TO_METERS / 3600
+        
+        # Time at the effective ground speed, as an equivalent no-wind distance
+        speed_mps = self.AIRCRAFT_SPEED * self.NM_TO_METERS / 3600
+        return base_distance / (speed_mps - wind_effect) * speed_mps
\ No newline at end of file
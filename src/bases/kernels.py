@@ -0,0 +1,177 @@
+import math
+import os
+import numpy as np
+
+try:
+    from numba import config, njit, prange
+    # NUMBA_DISABLE_JIT=1 makes the kernels plain Python, so prefer the NumPy paths then
+    USE_NUMBA = os.environ.get('NUMBA_DISABLE_JIT', '0') == '0'
+    # TBB's worker pool can hang interpreter exit once a subprocess (the ffmpeg writer for
+    # MP4 output) has been started, so rank it last unless the user chose an order
+    if 'NUMBA_THREADING_LAYER_PRIORITY' not in os.environ:
+        config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+except ImportError:
+    # Numba is optional; callers check USE_NUMBA and fall back to their NumPy path
+    USE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so the kernels below can still be defined"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# Fleet state ids (must match conops_simulation)
+_STATE_CIRCLE = 2
+_STATE_RTB = 3
+
+# Points per patrol route (4 straights of 20 points + 4 arcs of 10); a module-level
+# constant so Numba folds the wrap-around modulus at compile time
+ROUTE_LEN = 4 * 20 + 4 * 10
+
+
+@njit(cache=True, fastmath=True)
+def patrol_step(idx, pos_x, pos_y, heading, route_id, patrol_index, routes, speed, threshold_sq):
+    """Advance patrolling aircraft `idx` along their (ROUTE_LEN-point) racetrack routes in place"""
+    for k in range(idx.size):
+        i = idx[k]
+        r = route_id[i]
+        p = patrol_index[i]
+        dx = routes[r, p, 0] - pos_x[i]
+        dy = routes[r, p, 1] - pos_y[i]
+
+        # Once close enough, increment to the next point (wrap around)
+        if dx*dx + dy*dy < threshold_sq:
+            p = (p + 1) % ROUTE_LEN
+            patrol_index[i] = p
+            dx = routes[r, p, 0] - pos_x[i]
+            dy = routes[r, p, 1] - pos_y[i]
+
+        h = math.atan2(dy, dx)
+        pos_x[i] += speed * math.cos(h)
+        pos_y[i] += speed * math.sin(h)
+        heading[i] = h
+
+
+@njit(cache=True, fastmath=True)
+def intercept_step(idx, pos_x, pos_y, heading, state_id, fire_x, fire_y, speed, turn_radius_sq):
+    """Fly intercepting aircraft `idx` toward the fire, switching to circle on arrival"""
+    for k in range(idx.size):
+        i = idx[k]
+        dx = fire_x - pos_x[i]
+        dy = fire_y - pos_y[i]
+        if dx*dx + dy*dy < turn_radius_sq:
+            state_id[i] = _STATE_CIRCLE
+        else:
+            h = math.atan2(dy, dx)
+            pos_x[i] += speed * math.cos(h)
+            pos_y[i] += speed * math.sin(h)
+            heading[i] = h
+
+
+@njit(cache=True, fastmath=True)
+def circle_step(idx, pos_x, pos_y, heading, state_id, circle_time, fireballs_dropped,
+                next_drop_tick, first_responder, fire_x, fire_y, dt, tick,
+                interval_ticks, angular_step, turn_radius):
+    """Orbit circling aircraft `idx` around the fire and account for fireball drops"""
+    for k in range(idx.size):
+        i = idx[k]
+        circle_time[i] += dt
+
+        if i != first_responder:
+            # Drop three fireballs every `interval_ticks`
+            if tick >= next_drop_tick[i]:
+                fireballs_dropped[i] += 3
+                next_drop_tick[i] = tick + interval_ticks
+
+            # Supporting aircraft return after 2 minutes
+            if circle_time[i] >= 120:
+                state_id[i] = _STATE_RTB
+                continue
+
+        angle = math.atan2(pos_y[i] - fire_y, pos_x[i] - fire_x) + angular_step
+        pos_x[i] = fire_x + turn_radius * math.cos(angle)
+        pos_y[i] = fire_y + turn_radius * math.sin(angle)
+        heading[i] = angle + math.pi / 2
+
+
+@njit(cache=True, fastmath=True)
+def rtb_step(idx, pos_x, pos_y, heading, base_idx, base_x, base_y, speed, threshold_sq, keep):
+    """Return aircraft `idx` to their bases, clearing `keep` for those that have landed"""
+    for k in range(idx.size):
+        i = idx[k]
+        b = base_idx[i]
+        dx = base_x[b] - pos_x[i]
+        dy = base_y[b] - pos_y[i]
+        if dx*dx + dy*dy < threshold_sq:
+            keep[i] = False
+        else:
+            h = math.atan2(dy, dx)
+            pos_x[i] += speed * math.cos(h)
+            pos_y[i] += speed * math.sin(h)
+            heading[i] = h
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def coverage_counts(xs, ys, sites, max_range, speed, wind_speed, wind_cos, wind_sin, out):
+    """Write into out[i, j] how many sites reach grid point (xs[i], ys[j]) within the wind-adjusted range"""
+    for i in prange(xs.size):
+        for j in range(ys.size):
+            count = 0
+            for s in range(sites.shape[0]):
+                dx = xs[i] - sites[s, 0]
+                dy = ys[j] - sites[s, 1]
+                dist_sq = dx*dx + dy*dy
+                along = dx*wind_cos + dy*wind_sin
+                # Same sqrt-free form as GridSystem._within_wind_range
+                if dist_sq * speed <= max_range * (speed * math.sqrt(dist_sq) - wind_speed * along):
+                    count += 1
+            out[i, j] = count
+
+
+@njit(cache=True)
+def radial_probability(r_norm):
+    """Ring-shaped placement probability at normalized radius r_norm (see OptimizationSystem)"""
+    prob = math.exp(-((r_norm - 0.67)**2) / (2 * 0.45**2))
+    edge_penalty = math.exp(-((1 - r_norm)**2) / 0.1)
+    return prob - edge_penalty * 0.15
+
+
+@njit(cache=True)
+def generate_sites(center_x, center_y, max_radius, lower, upper, num_sites, seed):
+    """Rejection-sample num_sites launch sites on shuffled, evenly spaced bearings as an (N, 2) array"""
+    np.random.seed(seed)
+    angles = 2 * np.pi * np.arange(num_sites) / num_sites
+    np.random.shuffle(angles)
+
+    sites = np.empty((num_sites, 2))
+    for k in range(num_sites):
+        while True:
+            radius = np.random.uniform(0.4 * max_radius, max_radius)
+            if np.random.random() < radial_probability(radius / max_radius):
+                break
+        x = center_x + radius * math.cos(angles[k])
+        y = center_y + radius * math.sin(angles[k])
+        sites[k, 0] = min(max(x, lower), upper)
+        sites[k, 1] = min(max(y, lower), upper)
+    return sites
+
+
+@njit(cache=True)
+def coverage_histogram(counts, target):
+    """(zero, under, optimal, over) point counts of a flat coverage array in one pass"""
+    zero = 0
+    under = 0
+    optimal = 0
+    over = 0
+    for i in range(counts.size):
+        c = counts[i]
+        if c < target:
+            under += 1
+            if c == 0:
+                zero += 1
+        elif c == target:
+            optimal += 1
+        else:
+            over += 1
+    return zero, under, optimal, over
@@ -16,7 +16,7 @@ def main():
     print("Starting optimization process...")
     
     # Find minimum number of bases needed
-    best_solution = optimizer.find_minimum_bases(max_bases=16)
+    best_solution = optimizer.find_minimum_bases(max_bases=16, verbose=True)
     
     if not best_solution:
         print("No perfect solution found, using best attempt...")
@@ -38,7 +38,7 @@ def main():
     
     visualizer.save_optimization_animation(
         optimizer, 
-        'outputs/base_optimization/optimization.gif'
+        'outputs/base_optimization/optimization.mp4'
     )
     
     visualizer.plot_and_save_coverage_heatmap(
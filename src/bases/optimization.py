@@ -1,125 +1,258 @@
 import numpy as np
-from typing import Tuple, List
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
 from grid_system import GridSystem
+from kernels import USE_NUMBA, generate_sites, coverage_histogram
+
+
+def _run_chain(num_bases: int, seed: int, iterations: int, wind_direction: float,
+               verbose: bool = False) -> dict:
+    """Run one annealing chain for num_bases in a worker process on its own GridSystem"""
+    grid = GridSystem()
+    grid.wind_direction = wind_direction  # Share the caller's wind so chains are comparable
+    optimizer = OptimizationSystem(grid, seed=seed)
+    sites, _, counts = optimizer.optimize_sites(num_bases, iterations=iterations, verbose=verbose)
+    return {
+        'num_bases': num_bases,
+        'sites': sites,
+        'histogram': optimizer.coverage_histogram(counts, 5),
+        'base_history': optimizer.base_history
+    }
+
 
 class OptimizationSystem:
-    def __init__(self, grid: GridSystem):
+    # Parallel-tempering ladder as multiples of the burn-in temperature (cooled together each
+    # valid iteration) and replica-exchange interval
+    TEMPERATURE_LADDER = (0.5, 1.0, 2.0, 4.0, 8.0)
+    SWAP_INTERVAL = 5
+    BURN_IN_SAMPLES = 16  # Neighbour scores sampled to estimate the starting temperature
+    FINAL_TEMPERATURE_RATIO = 1e-3  # Ladder temperature after the last iteration, relative to the start
+    INVALID_SCORE = -2**63  # Integer score of configurations leaving a point uncovered (int64 minimum)
+
+    def __init__(self, grid: GridSystem, seed: int = None):
         self.grid = grid
+        self.rng = np.random.default_rng(seed)  # Per-optimizer PCG64 stream; seed for reproducible runs
         self.best_coverage = 0
         self.best_sites = []
         self.best_num_sites = 0
         self.optimal_solutions = []
         self.base_history = []
         
-    def calculate_radial_probability(self, r: float, max_radius: float) -> float:
-        """Calculate probability of placing base at given radius"""
-        # Normalize radius to [0,1]
-        r_norm = r / max_radius
+        # Ring-shaped placement probability tabulated over normalized radius [0, 1]
+        self._rnorm_grid = np.linspace(0, 1, 1024)
         
         # Parameters for ring-shaped distribution
         peak_radius = 0.67  # Peak probability at 2/3 of max radius
         spread = 0.45      # Wider spread for more natural distribution
         
         # Calculate gaussian probability centered at peak_radius
-        prob = np.exp(-((r_norm - peak_radius)**2) / (2 * spread**2))
+        prob = np.exp(-((self._rnorm_grid - peak_radius)**2) / (2 * spread**2))
         
         # Gentle reduction at edges
-        edge_penalty = np.exp(-((1-r_norm)**2) / 0.1)  # Softer edge penalty
-        return prob - edge_penalty * 0.15
+        edge_penalty = np.exp(-((1 - self._rnorm_grid)**2) / 0.1)  # Softer edge penalty
+        self._prob_lut = prob - edge_penalty * 0.15
+        
+    def calculate_radial_probability(self, r: float, max_radius: float) -> float:
+        """Calculate probability of placing base at given radius (r may be an array of radii)"""
+        # Normalize radius to [0,1]
+        r_norm = r / max_radius
+        
+        # Linearly interpolate the precomputed profile instead of evaluating two exps per radius
+        return np.interp(r_norm, self._rnorm_grid, self._prob_lut)
 
-    def generate_initial_sites(self, num_sites: int = 4) -> List[Tuple[float, float]]:
-        """Generate initial launch sites using radial distribution"""
-        sites = []
+    def generate_initial_sites(self, num_sites: int = 4) -> np.ndarray:
+        """Generate initial launch sites using radial distribution, as an (N, 2) array"""
         max_radius = min(self.grid.area_size_meters / 2.2,
                         self.grid.max_range * 1.1)
         center = (self.grid.area_size_meters / 2, self.grid.area_size_meters / 2)
         
+        margin = self.grid.max_range * 0.2  # Increased margin
+        if USE_NUMBA:
+            # Compiled rejection sampler, seeded from self.rng so the optimizer's seed still applies
+            return generate_sites(center[0], center[1], max_radius, margin,
+                                  self.grid.area_size_meters - margin, num_sites,
+                                  int(self.rng.integers(0, 2**31 - 1)))
+        
         # Generate sites using radial distribution
         angles = np.linspace(0, 2 * np.pi, num_sites, endpoint=False)
-        np.random.shuffle(angles)
-        
-        for angle in angles:
-            while True:
-                # Increased minimum radius to avoid center clustering
-                radius = np.random.uniform(0.4 * max_radius, max_radius)
-                prob = self.calculate_radial_probability(radius, max_radius)
-                if np.random.random() < prob:
-                    break
-            
-            x = center[0] + radius * np.cos(angle)
-            y = center[1] + radius * np.sin(angle)
-            
-            # Ensure within bounds with larger margin
-            margin = self.grid.max_range * 0.2  # Increased margin
-            x = np.clip(x, margin, self.grid.area_size_meters - margin)
-            y = np.clip(y, margin, self.grid.area_size_meters - margin)
-            
-            sites.append((x, y))
+        self.rng.shuffle(angles)
+        
+        # Rejection-sample every slot at once: a row of candidate radii per site, keeping the
+        # first accepted radius in each row and redrawing only rows with no acceptance
+        # (increased minimum radius to avoid center clustering)
+        trials = 8
+        radii = np.empty(num_sites)
+        pending = np.arange(num_sites)
+        while pending.size:
+            candidates = self.rng.uniform(0.4 * max_radius, max_radius, (pending.size, trials))
+            prob = self.calculate_radial_probability(candidates, max_radius)
+            accept = self.rng.random((pending.size, trials)) < prob
+            found = accept.any(axis=1)
+            first = np.argmax(accept[found], axis=1)
+            radii[pending[found]] = candidates[found, first]
+            pending = pending[~found]
+        
+        sites = np.empty((num_sites, 2))
+        sites[:, 0] = center[0] + radii * np.cos(angles)
+        sites[:, 1] = center[1] + radii * np.sin(angles)
+        
+        # Ensure within bounds with larger margin
+        np.clip(sites, margin, self.grid.area_size_meters - margin, out=sites)
         
         return sites
 
-    def optimize_sites(self, num_sites: int, iterations: int = 100) -> Tuple[List[Tuple[float, float]], float]:
-        """Optimize launch site locations"""
+    def optimize_sites(self, num_sites: int, iterations: int = 100,
+                       verbose: bool = False) -> Tuple[np.ndarray, float, np.ndarray]:
+        """
+        Optimize launch site locations by parallel tempering: one annealing replica per
+        temperature in TEMPERATURE_LADDER, with neighbouring replicas exchanging states
+        every SWAP_INTERVAL valid iterations so the cold replica can escape poor starts.
+        Returns the best sites, their normalized score and their coverage counts; verbose
+        prints a one-line summary at the end.
+        """
         valid_iterations = 0
         total_attempts = 0
         max_attempts = iterations * 4  # Limit total attempts to prevent infinite loops
         
-        current_sites = self.generate_initial_sites(num_sites)
-        self.grid.launch_sites = current_sites.copy()  # Make sure to copy the list
+        # Scale the ladder to the score spread of this problem and cool it geometrically to
+        # FINAL_TEMPERATURE_RATIO of its start over the requested iterations
+        temperatures = self._initial_temperature(num_sites) * np.array(self.TEMPERATURE_LADDER)
+        cooling_rate = self.FINAL_TEMPERATURE_RATIO ** (1 / iterations)
+        regen_probability = 0.3
         
-        temperature = 3.0
-        cooling_rate = 0.99
+        # Uniforms for every Metropolis test the loop can make, drawn in one batch
+        accept_u = self.rng.random((max_attempts, len(temperatures)))
         
-        best_coverage = float('-inf')
+        replica_sites = [self.generate_initial_sites(num_sites) for _ in temperatures]
+        replica_scores = [self.INVALID_SCORE] * len(temperatures)
+        replica_counts = [None] * len(temperatures)  # Coverage of each replica's sites, kept up to date
+        
+        best_coverage = self.INVALID_SCORE
         best_sites = None
+        best_counts = None
         
+        # Site and count arrays are never modified in place (perturb_sites, generate_initial_sites
+        # and the coverage updates work on fresh arrays), so replicas, the best state, history
+        # and the grid share them
         while valid_iterations < iterations and total_attempts < max_attempts:
             total_attempts += 1
+            any_valid = False
             
-            coverage_counts = self.grid.get_coverage_counts()
-            if np.sum(coverage_counts == 0) > 0:
-                # Try new configuration if there's zero coverage
-                current_sites = self.generate_initial_sites(num_sites)
-                self.grid.launch_sites = current_sites.copy()
-                continue
-            
-            valid_iterations += 1
-            if valid_iterations % 10 == 0:
-                print(f"Valid iteration {valid_iterations}/{iterations}")
-            
-            current_score = self.calculate_score(coverage_counts, num_sites)
-            
-            if current_score > best_coverage:
-                best_coverage = current_score
-                best_sites = current_sites.copy()
-                print(f"New best solution! Score: {current_score:.2f}")
-            
-            # Generate new configuration
-            new_sites = self.generate_initial_sites(num_sites)
-            self.grid.launch_sites = new_sites.copy()
+            for k, temperature in enumerate(temperatures):
+                current_sites = replica_sites[k]
+                if replica_counts[k] is None:
+                    self.grid.launch_sites = current_sites
+                    replica_counts[k] = self.grid.get_coverage_counts().copy()
+                
+                coverage_counts = replica_counts[k]
+                if not coverage_counts.all():
+                    # Try new configuration if there's zero coverage
+                    replica_sites[k] = self.generate_initial_sites(num_sites)
+                    replica_scores[k] = self.INVALID_SCORE
+                    replica_counts[k] = None
+                    continue
+                
+                any_valid = True
+                current_score = self.calculate_score(coverage_counts, num_sites)
+                replica_scores[k] = current_score
+                
+                if current_score > best_coverage:
+                    best_coverage = current_score
+                    best_sites = current_sites
+                    best_counts = coverage_counts
+                
+                # Perturb the current configuration, recounting coverage only for the moved sites
+                new_sites, moved = self.perturb_sites(current_sites, regen_probability)
+                if len(moved) == num_sites:
+                    self.grid.launch_sites = new_sites
+                    new_counts = self.grid.get_coverage_counts().copy()
+                else:
+                    new_counts = self.grid.update_coverage_counts(
+                        coverage_counts.copy(), current_sites[moved], new_sites[moved])
+                if not new_counts.all():
+                    continue
+                
+                new_score = self.calculate_score(new_counts, num_sites)
+                
+                delta = new_score - current_score
+                if delta > 0 or accept_u[total_attempts - 1, k] < np.exp(delta / temperature):
+                    replica_sites[k] = new_sites
+                    replica_scores[k] = new_score
+                    replica_counts[k] = new_counts
+                    if best_sites is not None:  # Only append to history if we have a valid solution
+                        self.base_history.append(new_sites)
             
-            coverage_counts = self.grid.get_coverage_counts()
-            if np.sum(coverage_counts == 0) > 0:
+            # Full regeneration gets rarer with every attempt (30% at the start, 5% floor)
+            regen_probability = max(0.05, regen_probability * 0.99)
+            if not any_valid:
                 continue
             
-            new_score = self.calculate_score(coverage_counts, num_sites)
-            
-            delta = new_score - current_score
-            if delta > 0 or np.random.random() < np.exp(delta / temperature):
-                current_sites = new_sites.copy()
-                if best_sites is not None:  # Only append to history if we have a valid solution
-                    self.base_history.append(new_sites)
+            valid_iterations += 1
+            temperatures *= cooling_rate
             
-            temperature *= cooling_rate
+            if valid_iterations % self.SWAP_INTERVAL == 0:
+                self._exchange_replicas(replica_sites, replica_scores, replica_counts, temperatures)
+        
+        if verbose:
+            print(f"{num_sites} sites: best score {best_coverage} after {valid_iterations} "
+                  f"valid iterations ({total_attempts} attempts)")
         
         if best_sites is None:
-            return current_sites, float('-inf')
+            self.grid.launch_sites = replica_sites[0]
+            counts = replica_counts[0]
+            if counts is None:
+                counts = self.grid.get_coverage_counts().copy()
+            return replica_sites[0], float('-inf'), counts
+        
+        # Leave the grid holding the returned sites, as coverage is no longer set per proposal
+        self.grid.launch_sites = best_sites
+        return best_sites, best_coverage / (self.grid.grid_points ** 2), best_counts
+
+    def _initial_temperature(self, num_sites: int) -> float:
+        """
+        Burn-in estimate of the starting temperature: the standard deviation of the scores of
+        BURN_IN_SAMPLES local moves from one fully covering configuration (1.0 if none is found)
+        """
+        for _ in range(self.BURN_IN_SAMPLES * 4):
+            self.grid.launch_sites = self.generate_initial_sites(num_sites)
+            counts = self.grid.get_coverage_counts()
+            if counts.all():
+                break
+        else:
+            return 1.0
+        
+        sites, counts = self.grid.launch_sites, counts.copy()
+        scores = [self.calculate_score(counts, num_sites)]
+        for _ in range(self.BURN_IN_SAMPLES - 1):
+            new_sites, moved = self.perturb_sites(sites, regen_probability=0)
+            new_counts = self.grid.update_coverage_counts(counts.copy(), sites[moved], new_sites[moved])
+            scores.append(self.calculate_score(new_counts, num_sites))
         
-        return best_sites, best_coverage / (self.grid.grid_points ** 2)
+        scores = np.array(scores)
+        spread = np.std(scores[scores != self.INVALID_SCORE])
+        return float(spread) if spread > 0 else 1.0
 
-    def find_minimum_bases(self, max_bases: int = 16) -> dict:
-        """Find optimal number of bases where over/under coverage lines intersect"""
-        print("\nSearching for optimal number of bases...")
+    def _exchange_replicas(self, replica_sites: list, replica_scores: list, replica_counts: list,
+                           temperatures: np.ndarray):
+        """Metropolis-swap the states of neighbouring replicas in the temperature ladder"""
+        for k in range(len(temperatures) - 1):
+            score_cold, score_hot = replica_scores[k], replica_scores[k + 1]
+            if score_cold == self.INVALID_SCORE or score_hot == self.INVALID_SCORE:
+                continue
+            
+            # A better state in the hotter replica always moves down the ladder
+            exponent = (score_hot - score_cold) * (1 / temperatures[k] - 1 / temperatures[k + 1])
+            if exponent >= 0 or self.rng.random() < np.exp(exponent):
+                replica_sites[k], replica_sites[k + 1] = replica_sites[k + 1], replica_sites[k]
+                replica_scores[k], replica_scores[k + 1] = score_hot, score_cold
+                replica_counts[k], replica_counts[k + 1] = replica_counts[k + 1], replica_counts[k]
+
+    def find_minimum_bases(self, max_bases: int = 16, verbose: bool = False) -> dict:
+        """Find optimal number of bases where over/under coverage lines intersect (verbose reports progress)"""
+        if verbose:
+            print("\nSearching for optimal number of bases...")
         best_solution = None
         best_score = float('-inf')
         
@@ -131,19 +264,32 @@ class OptimizationSystem:
             'num_bases': []
         }
         
-        # Start from 8 bases instead of 5, and use fewer iterations
-        for num_bases in range(8, max_bases + 1):
-            sites, _ = self.optimize_sites(num_bases, iterations=50)  # Reduced iterations
+        # Start from 8 bases instead of 5, and use fewer iterations. Each base count is an
+        # independent chain, so run them all in parallel (seeded from this optimizer's stream)
+        base_counts = list(range(8, max_bases + 1))
+        seeds = self.rng.integers(0, 2**31 - 1, size=len(base_counts)).tolist()
+        # Spawned (not forked) workers, as forking after Numba's thread pool has started can deadlock
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context) as pool:
+            chains = list(pool.map(_run_chain, base_counts, seeds,
+                                   [50] * len(base_counts),  # Reduced iterations
+                                   [self.grid.wind_direction] * len(base_counts),
+                                   [verbose] * len(base_counts)))
+        
+        # Merge results in base-count order, as the serial sweep would have seen them
+        total_points = self.grid.grid_points ** 2
+        for chain in chains:
+            num_bases = chain['num_bases']
+            sites = chain['sites']
+            self.base_history.extend(chain['base_history'])
             
             # Get coverage statistics
-            coverage_counts = self.grid.get_coverage_counts()
-            zero_coverage = np.sum(coverage_counts == 0)
+            zero_coverage, under_points, optimal_points, over_points = chain['histogram']
             
             # Calculate coverage metrics
-            total_points = self.grid.grid_points ** 2
-            optimal_coverage = np.sum(coverage_counts == 5) / total_points
-            under_coverage = np.sum(coverage_counts < 5) / total_points
-            over_coverage = np.sum(coverage_counts > 5) / total_points
+            optimal_coverage = optimal_points / total_points
+            under_coverage = under_points / total_points
+            over_coverage = over_points / total_points
             
             # Store metrics
             metrics_history['optimal_coverage'].append(optimal_coverage)
@@ -157,11 +303,12 @@ class OptimizationSystem:
                             abs(under_coverage - over_coverage) * 2000 -
                             num_bases * 25)
             
-            print(f"\nConfiguration with {num_bases} bases:")
-            print(f"Optimal coverage (5): {optimal_coverage:.1%}")
-            print(f"Under coverage (<5): {under_coverage:.1%}")
-            print(f"Over coverage (>5): {over_coverage:.1%}")
-            print(f"Score: {coverage_score:.2f}")
+            if verbose:
+                print(f"\nConfiguration with {num_bases} bases:")
+                print(f"Optimal coverage (5): {optimal_coverage:.1%}")
+                print(f"Under coverage (<5): {under_coverage:.1%}")
+                print(f"Over coverage (>5): {over_coverage:.1%}")
+                print(f"Score: {coverage_score:.2f}")
             
             # Update best solution when lines are closest to crossing
             if coverage_score > best_score and zero_coverage == 0:
@@ -174,66 +321,72 @@ class OptimizationSystem:
                     'under_ratio': under_coverage,
                     'over_ratio': over_coverage
                 }
-                print(f"New best configuration found!")
+                if verbose:
+                    print(f"New best configuration found!")
                 
                 # If we've found a good intersection point, we can stop
                 if abs(under_coverage - over_coverage) < 0.05:
-                    print(f"Found optimal intersection at {num_bases} bases!")
+                    if verbose:
+                        print(f"Found optimal intersection at {num_bases} bases!")
                     break
         
         best_solution['metrics_history'] = metrics_history
         return best_solution
 
-    def perturb_sites(self, sites: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
-        """Generate a new grid configuration rather than small movements"""
+    def perturb_sites(self, sites: np.ndarray, regen_probability: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate a new grid configuration rather than small movements. Returns the new sites
+        and the indices of the sites that moved, for GridSystem.update_coverage_counts.
+        """
         num_sites = len(sites)
         
-        # 50% chance to try a completely new configuration
-        if np.random.random() < 0.5:
-            return self.generate_initial_sites(num_sites)
+        # Occasionally try a completely new configuration
+        if self.rng.random() < regen_probability:
+            return self.generate_initial_sites(num_sites), np.arange(num_sites)
         
         # Otherwise, make larger movements to existing sites
         new_sites = sites.copy()
         
-        # Move 2-3 bases to new positions
-        num_moves = np.random.randint(2, 4)
-        for _ in range(num_moves):
-            idx = np.random.randint(0, len(sites))
-            
-            # Generate new position relative to center
-            center_x = self.grid.area_size_meters / 2
-            center_y = self.grid.area_size_meters / 2
-            angle = np.random.uniform(0, 2 * np.pi)
-            radius = np.random.uniform(0.3, 0.8) * self.grid.max_range
-            
-            x = center_x + radius * np.cos(angle)
-            y = center_y + radius * np.sin(angle)
-            
-            # Ensure within bounds
-            x = np.clip(x, self.grid.max_range * 0.2, 
-                       self.grid.area_size_meters - self.grid.max_range * 0.2)
-            y = np.clip(y, self.grid.max_range * 0.2, 
-                       self.grid.area_size_meters - self.grid.max_range * 0.2)
-            
-            new_sites[idx] = (x, y)
+        # Move 2-3 bases to new positions, generated relative to the center
+        num_moves = min(self.rng.integers(2, 4), num_sites)
+        idx = self.rng.choice(num_sites, size=num_moves, replace=False)  # Distinct, so every draw moves a site
+        center = self.grid.area_size_meters / 2
+        angle = self.rng.uniform(0, 2 * np.pi, size=num_moves)
+        radius = self.rng.uniform(0.3, 0.8, size=num_moves) * self.grid.max_range
+        new_sites[idx, 0] = center + radius * np.cos(angle)
+        new_sites[idx, 1] = center + radius * np.sin(angle)
         
-        return new_sites
-
-    def calculate_score(self, coverage_counts: np.ndarray, num_sites: int) -> float:
-        """Calculate score for current configuration"""
-        zero_coverage = np.sum(coverage_counts == 0)
+        # Ensure within bounds (untouched sites already are)
+        margin = self.grid.max_range * 0.2
+        np.clip(new_sites, margin, self.grid.area_size_meters - margin, out=new_sites)
         
-        # Immediately disqualify configurations with zero coverage
-        if zero_coverage > 0:
-            return float('-inf')
+        return new_sites, idx
+
+    def coverage_histogram(self, coverage_counts: np.ndarray, target: int = 5) -> Tuple[int, int, int, int]:
+        """Return (zero, under, optimal, over) point counts relative to target in a single pass"""
+        if USE_NUMBA:
+            # Compiled counting loop, no bin array or partial sums to allocate
+            return coverage_histogram(coverage_counts.ravel(), target)
         
+        bins = np.bincount(coverage_counts.ravel(), minlength=target + 2)
+        zero_coverage = int(bins[0])
+        under_coverage = int(bins[:target].sum())
+        optimal_coverage = int(bins[target])
+        over_coverage = int(bins[target + 1:].sum())
+        return zero_coverage, under_coverage, optimal_coverage, over_coverage
+
+    def calculate_score(self, coverage_counts: np.ndarray, num_sites: int) -> int:
+        """Calculate the (integer) score for current configuration"""
         # Target exactly 5 bases coverage
         target = 5
         
         # Calculate coverage distribution metrics
-        under_coverage = np.sum(coverage_counts < target)
-        over_coverage = np.sum(coverage_counts > target)
-        optimal_coverage = np.sum(coverage_counts == target)
+        zero_coverage, under_coverage, optimal_coverage, over_coverage = \
+            self.coverage_histogram(coverage_counts, target)
+        
+        # Disqualify configurations with zero coverage
+        if zero_coverage:
+            return self.INVALID_SCORE
         
         # Calculate intersection penalty
         intersection_penalty = abs(under_coverage - over_coverage) * 2000
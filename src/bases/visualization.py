@@ -1,5 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import imageio
+from PIL import Image
 from matplotlib.animation import FuncAnimation
 from matplotlib.patches import Circle
 import matplotlib.colors as colors
@@ -12,9 +14,24 @@ class Visualizer:
         self.grid = grid
         self.fig = None
         self.ax = None
+        
+        # Unit circle used to outline site ranges, sampled once rather than per plot
+        circle_angles = np.linspace(0, 2*np.pi, 100)
+        self._circle_cos = np.cos(circle_angles)
+        self._circle_sin = np.sin(circle_angles)
     
     def animate_optimization_heatmap(self, optimizer):
         """Animate the base placement optimization process"""
+        update, num_frames = self._setup_optimization_heatmap(optimizer)
+        anim = FuncAnimation(self.fig, update, 
+                             frames=num_frames,
+                             interval=50,  # Faster animation (50ms between frames)
+                             blit=True)
+        plt.show()
+        return anim
+
+    def _setup_optimization_heatmap(self, optimizer, animated: bool = True):
+        """Create the optimization heatmap figure and return its (update, num_frames)"""
         self.fig, self.ax = plt.subplots(figsize=(12, 10))
         
         # Initialize heatmap matrix
@@ -30,8 +47,7 @@ class Visualizer:
             if num_bases != current_base_count:
                 if current_base_frames:
                     # Sample 5 frames from previous base count
-                    indices = np.linspace(0, len(current_base_frames)-1, 5, dtype=int)
-                    all_history.extend([current_base_frames[i] for i in indices])
+                    all_history.extend(self._sample_frames(current_base_frames, 5))
                 current_base_count = num_bases
                 current_base_frames = [sites_list]
             else:
@@ -39,47 +55,46 @@ class Visualizer:
         
         # Add remaining frames
         if current_base_frames:
-            indices = np.linspace(0, len(current_base_frames)-1, 5, dtype=int)
-            all_history.extend([current_base_frames[i] for i in indices])
+            all_history.extend(self._sample_frames(current_base_frames, 5))
+        
+        # Color every frame up front, so playback only swaps image data on persistent artists.
+        # Counts are integers in [0, num_bases], so each base count gets a small RGBA lookup
+        # table (the colors imshow would pick with vmin=0, vmax=num_bases) indexed directly
+        cmap = plt.cm.RdYlBu_r  # Changed colormap
+        luts = {}
+        frame_rgba = []
+        for sites in all_history:
+            num_bases = len(sites)
+            if num_bases not in luts:
+                luts[num_bases] = cmap(np.linspace(0, 1, num_bases + 1), bytes=True)
+            self.grid.launch_sites = sites
+            frame_rgba.append(luts[num_bases][self.grid.get_coverage_counts().T])
+        
+        # Coverage heatmap, base markers and frame label, updated in place by update()
+        self._im = self.ax.imshow(np.zeros((self.grid.grid_points, self.grid.grid_points, 4), dtype=np.uint8),
+                                  extent=[0, self.grid.AREA_SIZE_NM, 0, self.grid.AREA_SIZE_NM],
+                                  origin='lower',
+                                  animated=animated)
+        self._scatter = self.ax.scatter([], [], marker='^', c='k', s=100, animated=animated)
+        # Frame info lives inside the axes since the title is outside the blitted region
+        self._label = self.ax.text(0.02, 0.98, '', transform=self.ax.transAxes, va='top',
+                                   bbox=dict(facecolor='white', alpha=0.8), animated=animated)
+        
+        self.ax.set_title('Optimization Progress')
+        self.ax.set_xlabel('Distance (NM)')
+        self.ax.set_ylabel('Distance (NM)')
+        self.ax.grid(True)
         
         def update(frame):
-            if frame < len(all_history):
-                sites = all_history[frame]
-                self.ax.clear()
-                
-                # Calculate coverage counts for current configuration
-                self.grid.launch_sites = sites
-                coverage_counts = self.grid.get_coverage_counts()
-                
-                # Plot coverage heatmap
-                im = self.ax.imshow(coverage_counts.T, 
-                             extent=[0, self.grid.AREA_SIZE_NM, 0, self.grid.AREA_SIZE_NM],
-                             origin='lower',
-                             cmap='RdYlBu_r',  # Changed colormap
-                             vmin=0,
-                             vmax=len(sites))
-                
-                # Plot current base locations
-                for site in sites:
-                    x_nm = site[0] / self.grid.NM_TO_METERS
-                    y_nm = site[1] / self.grid.NM_TO_METERS
-                    self.ax.plot(x_nm, y_nm, 'k^', markersize=10)
-                
-                self.ax.set_title(f'Optimization Progress - Frame {frame + 1}\n{len(sites)} Bases')
-                self.ax.set_xlabel('Distance (NM)')
-                self.ax.set_ylabel('Distance (NM)')
-                self.ax.grid(True)
-            
-            return []
+            sites = all_history[frame]
+            self._im.set_data(frame_rgba[frame])
+            self._scatter.set_offsets(np.asarray(sites) / self.grid.NM_TO_METERS)
+            self._label.set_text(f'Frame {frame + 1}\n{len(sites)} Bases')
+            return self._im, self._scatter, self._label
         
-        anim = FuncAnimation(self.fig, update, 
-                             frames=len(all_history),
-                             interval=50,  # Faster animation (50ms between frames)
-                             blit=True)
-        plt.show()
-        return anim
+        return update, len(all_history)
 
-    def plot_coverage_heatmap(self, sites: List[Tuple[float, float]]):
+    def plot_coverage_heatmap(self, sites: np.ndarray):
         """Plot coverage heatmap with wind-adjusted range circles"""
         plt.figure(figsize=(12, 10))
         
@@ -94,34 +109,22 @@ class Visualizer:
                        origin='lower',
                        cmap='RdYlBu')
         
-        # Plot base locations and wind-adjusted range ellipses
-        for site in sites:
-            x_nm = site[0] / self.grid.NM_TO_METERS
-            y_nm = site[1] / self.grid.NM_TO_METERS
-            
-            # Create points for wind-adjusted range
-            angles = np.linspace(0, 2*np.pi, 100)
-            range_points_x = []
-            range_points_y = []
-            
-            for angle in angles:
-                # Create point at max range
-                dx = np.cos(angle) * self.grid.max_range
-                dy = np.sin(angle) * self.grid.max_range
-                point = (site[0] + dx, site[1] + dy)
-                
-                # Adjust for wind
-                wind_adjusted_dist = self.grid.calculate_wind_adjusted_distance(site, point)
-                scale_factor = self.grid.max_range / wind_adjusted_dist
-                
-                range_points_x.append((site[0] + dx * scale_factor) / self.grid.NM_TO_METERS)
-                range_points_y.append((site[1] + dy * scale_factor) / self.grid.NM_TO_METERS)
-            
-            # Plot wind-adjusted range
-            plt.plot(range_points_x, range_points_y, '--', color='black', alpha=0.5)
-            
-            # Plot base location
-            plt.plot(x_nm, y_nm, 'k^', markersize=10)
+        # The wind field is uniform, so the wind-adjusted range boundary has the same shape
+        # around every site: compute it once relative to the origin, then translate per site
+        dx = self._circle_cos * self.grid.max_range
+        dy = self._circle_sin * self.grid.max_range
+        wind_adjusted_dist = self.grid.calculate_wind_adjusted_distances((0.0, 0.0), dx, dy)
+        scale_factor = self.grid.max_range / wind_adjusted_dist
+        range_dx_nm = dx * scale_factor / self.grid.NM_TO_METERS
+        range_dy_nm = dy * scale_factor / self.grid.NM_TO_METERS
+        
+        # Plot wind-adjusted range ellipses
+        sites_nm = np.reshape(sites, (-1, 2)) / self.grid.NM_TO_METERS
+        for x_nm, y_nm in sites_nm:
+            plt.plot(x_nm + range_dx_nm, y_nm + range_dy_nm, '--', color='black', alpha=0.5)
+        
+        # Plot base locations as a single artist
+        plt.plot(sites_nm[:, 0], sites_nm[:, 1], 'k^', markersize=10)
         
         # Add wind vector arrow
         wind_speed_nm = self.grid.wind_speed_knots / 3600  # Convert to NM/s
@@ -141,12 +144,81 @@ class Visualizer:
         plt.grid(True)
         plt.show()
 
-    def save_optimization_animation(self, optimizer, filename='optimization.gif'):
-        """Save the optimization animation as a gif"""
-        anim = self.animate_optimization_heatmap(optimizer)
-        anim.save(filename, writer='pillow')
+    def save_optimization_animation(self, optimizer, filename='optimization.gif', fmt: str = None):
+        """
+        Save the optimization animation as 'gif' or 'mp4' (fmt defaults to the filename's
+        extension). MP4 is encoded with libx264 through ffmpeg, so it needs imageio-ffmpeg.
+        """
+        if fmt is None:
+            fmt = 'mp4' if filename.lower().endswith('.mp4') else 'gif'
+        
+        # Frames are read from the whole canvas, so the artists are drawn normally (not animated)
+        update, num_frames = self._setup_optimization_heatmap(optimizer, animated=False)
+        
+        # Frames are 50ms apart either way
+        if fmt == 'mp4':
+            # Raw RGB frames are piped to ffmpeg as they are rendered
+            with imageio.get_writer(filename, fps=20, codec='libx264', quality=8,
+                                    macro_block_size=1) as writer:
+                for frame in range(num_frames):
+                    update(frame)
+                    writer.append_data(self._render_rgb(self.fig))
+        else:
+            frames = []
+            for frame in range(num_frames):
+                update(frame)
+                frames.append(self._render_rgb(self.fig))
+            # Only the base markers and label change between most frames, so encode frame deltas
+            self._save_gif(frames, filename, duration=50, transparent_diff=True)
+        
+        plt.close(self.fig)
+
+    @staticmethod
+    def _sample_frames(frames: list, count: int) -> list:
+        """Pick count evenly spaced frames, first and last included (repeating when there are fewer)"""
+        # Integer form of np.linspace(0, len(frames) - 1, count, dtype=int)
+        last = len(frames) - 1
+        return [frames[k * last // (count - 1)] for k in range(count)]
 
-    def plot_and_save_coverage_heatmap(self, sites: List[Tuple[float, float]], filename='coverage.svg'):
+    @staticmethod
+    def _render_rgb(fig) -> np.ndarray:
+        """Draw fig on its Agg canvas and return a copy of the pixels as an (H, W, 3) uint8 array"""
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba())[:, :, :3].copy()
+
+    @staticmethod
+    def _save_gif(frames: List[np.ndarray], filename: str, duration: int,
+                  transparent_diff: bool = False):
+        """
+        Assemble RGB frames into a looping gif with Pillow in a single save (duration in ms).
+        With transparent_diff, all frames share one 255-color palette and pixels unchanged
+        from the previous frame are written as the transparent index 0, which LZW compresses
+        to almost nothing when consecutive frames are mostly identical.
+        """
+        if not transparent_diff:
+            images = [Image.fromarray(frame) for frame in frames]
+            images[0].save(filename, format='GIF', save_all=True, append_images=images[1:],
+                           duration=duration, loop=0, optimize=True)
+            return
+        
+        # Quantize every frame side by side in one call so they share a palette
+        mega = Image.fromarray(np.hstack(frames)).quantize(colors=255, dither=Image.Dither.NONE)
+        palette = [0, 0, 0] + mega.getpalette()[:255 * 3]  # Index 0 reserved for transparency
+        
+        images = []
+        previous = None
+        for indices in np.hsplit(np.asarray(mega) + np.uint8(1), len(frames)):
+            delta = indices if previous is None else np.where(indices == previous, 0, indices)
+            image = Image.fromarray(delta.astype(np.uint8), mode='P')
+            image.putpalette(palette)
+            images.append(image)
+            previous = indices
+        
+        # Frames are drawn over the previous one (disposal 1) so transparent pixels keep it
+        images[0].save(filename, format='GIF', save_all=True, append_images=images[1:], duration=duration,
+                       loop=0, transparency=0, disposal=1, optimize=False)
+
+    def plot_and_save_coverage_heatmap(self, sites: np.ndarray, filename='coverage.svg'):
         """Plot and save coverage heatmap as SVG"""
         self.plot_coverage_heatmap(sites)
         plt.savefig(filename, format='svg', bbox_inches='tight')
@@ -154,63 +226,73 @@ class Visualizer:
 
     def animate_coverage_metrics(self, metrics_history):
         """Create animated line plot of coverage metrics"""
+        fig, update, total_frames = self._setup_coverage_metrics(metrics_history)
+        anim = FuncAnimation(fig, update,
+                            frames=total_frames,
+                            interval=200,
+                            repeat=False,
+                            blit=True)
+        
+        return anim, fig
+
+    def _setup_coverage_metrics(self, metrics_history, animated: bool = True):
+        """Create the coverage metrics figure and return its (fig, update, total_frames)"""
         fig, ax = plt.subplots(figsize=(10, 6))
         
+        # Series as arrays (percentages) once, so frames only take slices
+        num_bases = np.asarray(metrics_history['num_bases'])
+        series = [np.asarray(metrics_history['optimal_coverage']) * 100,
+                  np.asarray(metrics_history['under_coverage']) * 100,
+                  np.asarray(metrics_history['over_coverage']) * 100]
+        
+        # Lines are created once with the full data so the axes autoscale to the final state,
+        # then the limits are frozen since blitted updates do not rescale
+        lines = [ax.plot(num_bases, series[0], 'g-', label='Optimal Coverage (5)', animated=animated)[0],
+                 ax.plot(num_bases, series[1], 'r-', label='Under Coverage (<5)', animated=animated)[0],
+                 ax.plot(num_bases, series[2], 'b-', label='Over Coverage (>5)', animated=animated)[0]]
+        ax.set_xlim(ax.get_xlim())
+        
+        ax.set_xlabel('Number of Bases')
+        ax.set_ylabel('Coverage (%)')
+        ax.set_title('Coverage Metrics vs Number of Bases')
+        ax.grid(True)
+        ax.legend()
+        ax.set_ylim(0, 100)
+        
         def update(frame):
-            ax.clear()
             # Use actual frame number for all frames except the last few
-            if frame < len(metrics_history['num_bases']):
-                end_idx = frame + 1
-            else:
-                # For extra frames, keep showing the final state
-                end_idx = len(metrics_history['num_bases'])
-            
-            # Plot lines
-            ax.plot(metrics_history['num_bases'][:end_idx], 
-                    np.array(metrics_history['optimal_coverage'][:end_idx]) * 100,
-                    'g-', label='Optimal Coverage (5)')
-            ax.plot(metrics_history['num_bases'][:end_idx],
-                    np.array(metrics_history['under_coverage'][:end_idx]) * 100,
-                    'r-', label='Under Coverage (<5)')
-            ax.plot(metrics_history['num_bases'][:end_idx],
-                    np.array(metrics_history['over_coverage'][:end_idx]) * 100,
-                    'b-', label='Over Coverage (>5)')
-            
-            ax.set_xlabel('Number of Bases')
-            ax.set_ylabel('Coverage (%)')
-            ax.set_title('Coverage Metrics vs Number of Bases')
-            ax.grid(True)
-            ax.legend()
-            ax.set_ylim(0, 100)
-            
-            return []
+            # (for extra frames, keep showing the final state)
+            end_idx = min(frame + 1, len(num_bases))
+            for line, values in zip(lines, series):
+                line.set_data(num_bases[:end_idx], values[:end_idx])
+            return lines
         
         # Add 10 extra frames at the end
         total_frames = len(metrics_history['num_bases']) + 10
-        anim = FuncAnimation(fig, update,
-                            frames=total_frames,
-                            interval=200,
-                            repeat=False)
-        
-        return anim, fig
+        return fig, update, total_frames
 
     def save_coverage_metrics_animation(self, metrics_history, filename='outputs/base_optimization/coverage_metrics.gif'):
         """Save coverage metrics animation as gif and final frame as png"""
         # Create parent directory if it doesn't exist
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         
-        anim, fig = self.animate_coverage_metrics(metrics_history)
+        # Frames are read from the whole canvas, so the lines are drawn normally (not animated)
+        fig, update, total_frames = self._setup_coverage_metrics(metrics_history, animated=False)
         
-        # Save the animation
-        anim.save(filename, writer='pillow', fps=5)
+        # Save the animation (5 fps). The extra frames at the end all show the final state,
+        # so that frame is rendered once and repeated
+        num_points = len(metrics_history['num_bases'])
+        frames = []
+        for frame in range(num_points):
+            update(frame)
+            frames.append(self._render_rgb(fig))
+        frames.extend([frames[-1]] * (total_frames - num_points))
+        self._save_gif(frames, filename, duration=200)
         
         # Save the final frame as high-quality PNG
         png_filename = filename.replace('.gif', '_final.png')
         
-        # Create the final frame
-        update = anim._func  # Get the update function
-        update(len(metrics_history['num_bases']))  # Update to final state
-        
+        # The extra frames at the end already left the figure in its final state
         # Save as high-quality PNG
         fig.savefig(png_filename, dpi=300, bbox_inches='tight')
         plt.close(fig)
\ No newline at end of file
@@ -0,0 +1,33 @@
+import os
+
+try:
+    from numba import njit
+    # NUMBA_DISABLE_JIT=1 makes the kernels plain Python, so prefer the NumPy paths then
+    USE_NUMBA = os.environ.get('NUMBA_DISABLE_JIT', '0') == '0'
+except ImportError:
+    # Numba is optional; callers check USE_NUMBA and fall back to their NumPy path
+    USE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so the kernels below can still be defined"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True)
+def consumed_moments(weights, locations, rates, consumable, time_hours):
+    """Total weight and (x, y, z) moments after consuming the consumables for time_hours"""
+    total = 0.0
+    mx = 0.0
+    my = 0.0
+    mz = 0.0
+    for i in range(weights.size):
+        w = weights[i]
+        if consumable[i]:
+            w = max(0.0, w - rates[i] * time_hours)
+        total += w
+        mx += w * locations[i, 0]
+        my += w * locations[i, 1]
+        mz += w * locations[i, 2]
+    return total, mx, my, mz
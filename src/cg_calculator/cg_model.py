@@ -4,7 +4,9 @@ from typing import List, Tuple, Dict, Optional
 import json
 import os
 
-@dataclass
+from cg_kernels import USE_NUMBA, consumed_moments
+
+@dataclass(slots=True, frozen=True)  # Immutable, so CGModel's array mirror cannot go stale
 class Component:
     """Aircraft component with weight and location information"""
     name: str
@@ -35,115 +37,187 @@ class CGModel:
         self.reference_point: Tuple[float, float, float] = (0, 0, 0)
         self.model_path: Optional[str] = None
         self.units: str = "metric"  # "metric" or "imperial"
+    
+    @property
+    def components(self) -> List[Component]:
+        """Components in insertion order (use add_component/remove_component to change them)"""
+        return self._components
+    
+    @components.setter
+    def components(self, components: List[Component]) -> None:
+        # Structure-of-arrays mirror of the component list, kept in sync by add/remove_component
+        # so the CG calculations are whole-array reductions (rows past the count are spare capacity)
+        self._components: List[Component] = []
+        self._weights = np.empty(0)
+        self._locations = np.empty((0, 3))
+        self._sizes = np.empty((0, 3))
+        self._rates = np.empty(0)
+        self._consumable = np.empty(0, dtype=bool)
+        self._category_ids = np.empty(0, dtype=np.intp)
+        self._category_index: Dict[str, int] = {}  # Category name -> id, in first-seen order
+        
+        # (total weight, CG) memo, valid while _cache_version matches _version, which
+        # every add/remove bumps
+        self._version = 0
+        self._cache_version = -1
+        self._totals: Tuple[float, Optional[Tuple[float, float, float]]] = (0.0, None)
+        self._bounds_version = -1
+        self._bounds: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        for component in components:
+            self.add_component(component)
         
+    @property
+    def locations(self) -> np.ndarray:
+        """(N, 3) component locations in component order (a view, valid until the next change)"""
+        return self._locations[:len(self._components)]
+    
+    @property
+    def sizes(self) -> np.ndarray:
+        """(N, 3) component sizes in component order (a view, valid until the next change)"""
+        return self._sizes[:len(self._components)]
+    
+    @property
+    def bounds(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (min, max) corners of the box enclosing every component's extent, or None without
+        components. Cached until the components change; the arrays are read-only.
+        """
+        if self._bounds_version != self._version:
+            self._bounds = None
+            if self._components:
+                half_sizes = self.sizes / 2
+                min_bound = np.min(self.locations - half_sizes, axis=0)
+                max_bound = np.max(self.locations + half_sizes, axis=0)
+                min_bound.flags.writeable = False
+                max_bound.flags.writeable = False
+                self._bounds = (min_bound, max_bound)
+            self._bounds_version = self._version
+        return self._bounds
+    
     def add_component(self, component: Component) -> None:
         """Add a component to the aircraft"""
-        self.components.append(component)
+        n = len(self._components)
+        if n == len(self._weights):
+            self._grow()
+        
+        self._weights[n] = component.weight
+        self._locations[n] = component.location
+        self._sizes[n] = component.size
+        self._rates[n] = component.consumption_rate
+        self._consumable[n] = component.is_consumable
+        self._category_ids[n] = self._category_index.setdefault(component.category,
+                                                                len(self._category_index))
+        self._components.append(component)
+        self._version += 1
+    
+    def _grow(self) -> None:
+        """Double the capacity of the component arrays (starting at 16 rows)"""
+        capacity = max(16, 2 * len(self._weights))
+        for name in ('_weights', '_locations', '_sizes', '_rates', '_consumable', '_category_ids'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
         
     def remove_component(self, component_name: str) -> bool:
         """Remove a component by name"""
-        for i, comp in enumerate(self.components):
+        for i, comp in enumerate(self._components):
             if comp.name == component_name:
-                self.components.pop(i)
+                n = len(self._components)
+                self._components.pop(i)
+                # Shift the rows after i up by one
+                for arr in (self._weights, self._locations, self._sizes, self._rates,
+                            self._consumable, self._category_ids):
+                    arr[i:n - 1] = arr[i + 1:n]
+                self._version += 1
                 return True
         return False
     
+    def _weighted_cg(self, weights: np.ndarray) -> Tuple[float, float, float]:
+        """CG of the components with the given per-component weights"""
+        total_weight = weights.sum()
+        
+        if total_weight == 0:
+            return self.reference_point
+        
+        moments = weights @ self._locations[:len(weights)]
+        return tuple((moments / total_weight).tolist())
+    
+    def _weight_and_cg(self) -> Tuple[float, Optional[Tuple[float, float, float]]]:
+        """Total weight and CG (None when weightless) of the components, cached until they change"""
+        if self._cache_version != self._version:
+            weights = self._weights[:len(self._components)]
+            total_weight = float(weights.sum())
+            cg = None
+            if total_weight != 0:
+                moments = weights @ self._locations[:len(weights)]
+                cg = tuple((moments / total_weight).tolist())
+            self._totals = (total_weight, cg)
+            self._cache_version = self._version
+        return self._totals
+    
     def calculate_cg(self) -> Tuple[float, float, float]:
         """Calculate the center of gravity"""
-        if not self.components:
-            return self.reference_point
-            
-        total_weight = sum(comp.weight for comp in self.components)
+        _, cg = self._weight_and_cg()
         
-        if total_weight == 0:
+        # Without weight there is no CG (the reference point is not cached, it may be reassigned)
+        if cg is None:
             return self.reference_point
-            
-        x_moment = sum(comp.moment[0] for comp in self.components)
-        y_moment = sum(comp.moment[1] for comp in self.components)
-        z_moment = sum(comp.moment[2] for comp in self.components)
         
-        return (
-            x_moment / total_weight,
-            y_moment / total_weight,
-            z_moment / total_weight
-        )
+        return cg
     
     def calculate_category_cg(self) -> Dict[str, Tuple[float, float, float]]:
         """Calculate CG for each category of components"""
-        categories = {}
+        n = len(self._components)
+        weights = self._weights[:n]
+        locations = self._locations[:n]
+        ids = self._category_ids[:n]
+        num_ids = len(self._category_index)
+        
+        # Per-category weight and moment sums in one bincount pass per column
+        total_weight = np.bincount(ids, weights=weights, minlength=num_ids)
+        moments = np.column_stack([np.bincount(ids, weights=weights * locations[:, axis],
+                                               minlength=num_ids)
+                                   for axis in range(3)])
         
-        # Group components by category
-        for comp in self.components:
-            if comp.category not in categories:
-                categories[comp.category] = []
-            categories[comp.category].append(comp)
+        # Categories that still have components, ordered by their first component
+        present, first = np.unique(ids, return_index=True)
+        names = list(self._category_index)
         
-        # Calculate CG for each category
         category_cg = {}
-        for category, comps in categories.items():
-            total_weight = sum(comp.weight for comp in comps)
-            
-            if total_weight == 0:
-                category_cg[category] = self.reference_point
+        for cat_id in present[np.argsort(first)]:
+            if total_weight[cat_id] == 0:
+                category_cg[names[cat_id]] = self.reference_point
                 continue
-                
-            x_moment = sum(comp.moment[0] for comp in comps)
-            y_moment = sum(comp.moment[1] for comp in comps)
-            z_moment = sum(comp.moment[2] for comp in comps)
             
-            category_cg[category] = (
-                x_moment / total_weight,
-                y_moment / total_weight,
-                z_moment / total_weight
-            )
+            category_cg[names[cat_id]] = tuple((moments[cat_id] / total_weight[cat_id]).tolist())
             
         return category_cg
     
     def get_total_weight(self) -> float:
         """Get the total weight of all components"""
-        return sum(comp.weight for comp in self.components)
+        total_weight, _ = self._weight_and_cg()
+        return total_weight
     
     def simulate_consumption(self, time_hours: float) -> Tuple[float, float, float]:
         """Simulate CG change after consuming resources for given time"""
-        # Create a copy of components with adjusted weights for consumables
-        adjusted_components = []
-        
-        for comp in self.components:
-            if comp.is_consumable:
-                # Calculate remaining weight after consumption
-                remaining_weight = max(0, comp.weight - (comp.consumption_rate * time_hours))
-                
-                # Create adjusted component
-                adjusted_comp = Component(
-                    name=comp.name,
-                    weight=remaining_weight,
-                    location=comp.location,
-                    size=comp.size,
-                    color=comp.color,
-                    category=comp.category,
-                    is_consumable=comp.is_consumable,
-                    consumption_rate=comp.consumption_rate
-                )
-                adjusted_components.append(adjusted_comp)
-            else:
-                # Non-consumable components remain unchanged
-                adjusted_components.append(comp)
-        
-        # Calculate CG with adjusted components
-        total_weight = sum(comp.weight for comp in adjusted_components)
-        
-        if total_weight == 0:
-            return self.reference_point
-            
-        x_moment = sum(comp.weight * comp.location[0] for comp in adjusted_components)
-        y_moment = sum(comp.weight * comp.location[1] for comp in adjusted_components)
-        z_moment = sum(comp.weight * comp.location[2] for comp in adjusted_components)
+        n = len(self._components)
+        weights = self._weights[:n]
+
+        if USE_NUMBA:
+            # One compiled pass per call; the consumption animation calls this every frame
+            total_weight, mx, my, mz = consumed_moments(weights, self._locations[:n], self._rates[:n],
+                                                        self._consumable[:n], time_hours)
+            if total_weight == 0:
+                return self.reference_point
+            return (mx / total_weight, my / total_weight, mz / total_weight)
+
+        # Remaining weight after consumption for consumables; others remain unchanged
+        remaining = np.maximum(0, weights - self._rates[:n] * time_hours)
+        adjusted_weights = np.where(self._consumable[:n], remaining, weights)
         
-        return (
-            x_moment / total_weight,
-            y_moment / total_weight,
-            z_moment / total_weight
-        )
+        # Calculate CG with adjusted weights
+        return self._weighted_cg(adjusted_weights)
     
     def save_to_file(self, filename: str) -> None:
         """Save the model to a JSON file"""
@@ -5,51 +5,79 @@ import json
 import trimesh
 import tempfile
 import subprocess
+import hashlib
+import shutil
+import textwrap
 
 class ModelImporter:
     """Import 3D models from various formats for CG visualization"""
     
-    @staticmethod
-    def import_stl(file_path: str) -> Optional[trimesh.Trimesh]:
-        """Import an STL file"""
-        try:
-            mesh = trimesh.load(file_path)
-            return mesh
-        except Exception as e:
-            print(f"Error importing STL file: {e}")
-            return None
+    # Loaded meshes keyed by absolute path, as (mtime, size, mesh), so re-importing an
+    # unchanged file skips parsing it again; a changed file replaces its entry
+    _mesh_cache: Dict[str, Tuple[float, int, trimesh.Trimesh]] = {}
     
-    @staticmethod
-    def import_obj(file_path: str) -> Optional[trimesh.Trimesh]:
-        """Import an OBJ file"""
+    @classmethod
+    def _load_mesh(cls, file_path: str) -> trimesh.Trimesh:
+        """
+        Load a mesh file with trimesh, reusing the previous parse if the file is unchanged.
+        Returns a copy, so callers may modify it without affecting the cached mesh.
+        """
+        stat = os.stat(file_path)
+        path = os.path.abspath(file_path)
+        entry = cls._mesh_cache.get(path)
+        if entry is None or entry[:2] != (stat.st_mtime, stat.st_size):
+            entry = (stat.st_mtime, stat.st_size, trimesh.load(file_path))
+            cls._mesh_cache[path] = entry
+        return entry[2].copy()
+    
+    @classmethod
+    def import_mesh(cls, file_path: str) -> Optional[trimesh.Trimesh]:
+        """Import a mesh file trimesh reads directly (STL, OBJ)"""
         try:
-            mesh = trimesh.load(file_path)
-            return mesh
+            return cls._load_mesh(file_path)
         except Exception as e:
-            print(f"Error importing OBJ file: {e}")
+            file_type = os.path.splitext(file_path)[1].lstrip('.').upper()
+            print(f"Error importing {file_type} file: {e}")
             return None
     
-    @staticmethod
-    def import_step(file_path: str) -> Optional[trimesh.Trimesh]:
-        """Import a STEP file (requires FreeCAD)"""
+    # Kept as names for the individual formats
+    import_stl = import_mesh
+    import_obj = import_mesh
+    
+    # Converted STEP files, named by a hash of the source's (absolute path, mtime, size)
+    STEP_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                  'fat-sparrow', 'step2stl')
+    
+    @classmethod
+    def import_step(cls, file_path: str) -> Optional[trimesh.Trimesh]:
+        """Import a STEP file (requires FreeCAD; conversions are cached in STEP_CACHE_DIR)"""
         try:
+            # Reuse the STL from an earlier conversion of this exact file
+            stat = os.stat(file_path)
+            key = f"{os.path.abspath(file_path)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+            digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+            cached_file = os.path.join(cls.STEP_CACHE_DIR, f"{digest}.stl")
+            if os.path.exists(cached_file):
+                return cls._load_mesh(cached_file)
+            
             # Create a temporary directory for conversion
             with tempfile.TemporaryDirectory() as temp_dir:
                 output_file = os.path.join(temp_dir, "converted.stl")
                 
                 # Use FreeCAD to convert STEP to STL
                 # Note: This requires FreeCAD to be installed
-                conversion_script = f"""
+                # (paths are embedded as Python literals so spaces and quotes survive)
+                conversion_script = textwrap.dedent(f"""
                 import FreeCAD
                 import Part
                 import Mesh
                 
                 doc = FreeCAD.newDocument()
                 shape = Part.Shape()
-                shape.read("{file_path}")
+                shape.read({file_path!r})
                 doc.addObject("Part::Feature", "Part").Shape = shape
-                Mesh.export([doc.Part], "{output_file}")
-                """
+                Mesh.export([doc.Part], {output_file!r})
+                """)
                 
                 script_path = os.path.join(temp_dir, "convert.py")
                 with open(script_path, 'w') as f:
@@ -58,10 +86,22 @@ class ModelImporter:
                 # Run FreeCAD with the conversion script
                 subprocess.run(["freecad", "-c", script_path], check=True)
                 
-                # Load the converted STL file
+                # Keep the converted STL file, then load it. The cache is best-effort: if it
+                # cannot be written, load the conversion straight from the temporary directory
                 if os.path.exists(output_file):
-                    mesh = trimesh.load(output_file)
-                    return mesh
+                    partial_file = f"{cached_file}.{os.getpid()}.tmp"
+                    try:
+                        os.makedirs(cls.STEP_CACHE_DIR, exist_ok=True)
+                        shutil.copyfile(output_file, partial_file)
+                        os.replace(partial_file, cached_file)
+                    except OSError as e:
+                        print(f"Could not cache converted STEP file: {e}")
+                        try:
+                            os.remove(partial_file)
+                        except OSError:
+                            pass
+                        return trimesh.load(output_file)
+                    return cls._load_mesh(cached_file)
                 else:
                     print("Conversion failed: output file not found")
                     return None
@@ -85,28 +125,30 @@ class ModelImporter:
         print("OpenVSP files must be exported to STL or OBJ format first")
         return None
     
+    # Importer method name for each supported file extension
+    _IMPORTERS: Dict[str, str] = {
+        '.stl': 'import_mesh',
+        '.obj': 'import_mesh',
+        '.step': 'import_step',
+        '.stp': 'import_step',
+        '.f3d': 'import_fusion360',
+        '.vsp': 'import_openvsp',
+    }
+    
     @classmethod
     def import_model(cls, file_path: str) -> Optional[trimesh.Trimesh]:
-        """Import a 3D model based on file extension"""
+        """Import a 3D model based on file extension (a fresh mesh the caller owns)"""
         if not os.path.exists(file_path):
             print(f"File not found: {file_path}")
             return None
             
         file_ext = os.path.splitext(file_path)[1].lower()
-        
-        if file_ext == '.stl':
-            return cls.import_stl(file_path)
-        elif file_ext == '.obj':
-            return cls.import_obj(file_path)
-        elif file_ext == '.step' or file_ext == '.stp':
-            return cls.import_step(file_path)
-        elif file_ext == '.f3d':
-            return cls.import_fusion360(file_path)
-        elif file_ext == '.vsp':
-            return cls.import_openvsp(file_path)
-        else:
+        importer = cls._IMPORTERS.get(file_ext)
+        if importer is None:
             print(f"Unsupported file format: {file_ext}")
             return None
+        
+        return getattr(cls, importer)(file_path)
     
     @staticmethod
     def get_model_dimensions(mesh: trimesh.Trimesh) -> Tuple[float, float, float]:
@@ -8,6 +8,20 @@ from typing import List, Tuple, Dict, Optional
 import os
 from cg_model import CGModel, Component
 
+# Unit cube corners (as -1/+1 offsets in each axis) and its faces as corner indices
+_CUBE_CORNERS = np.array([
+    [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+    [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]
+])
+_CUBE_FACES = np.array([
+    [0, 1, 2, 3],  # bottom
+    [4, 5, 6, 7],  # top
+    [0, 1, 5, 4],  # front
+    [2, 3, 7, 6],  # back
+    [0, 3, 7, 4],  # left
+    [1, 2, 6, 5]   # right
+])
+
 class CGVisualizer:
     """Visualize aircraft CG and components"""
     
@@ -16,8 +30,13 @@ class CGVisualizer:
         self.fig = None
         self.ax = None
         self.mesh = None
+        self._mesh_triangles = None  # (F, 3, 3) float32 face corners of self.mesh, set by set_mesh
         self.cg_marker = None
         self.component_markers = []
+        self.component_labels = []
+        self._component_faces = None  # (6N, 4, 3) faces of the plotted component cubes
+        self._mesh_collection = None
+        self._overlay_artists = []  # Per-view artists (CG markers, path, text), dropped on view switch
         self.category_colors = {
             "structure": "#1f77b4",  # blue
             "payload": "#ff7f0e",    # orange
@@ -31,102 +50,133 @@ class CGVisualizer:
     def set_mesh(self, mesh: trimesh.Trimesh) -> None:
         """Set the 3D model mesh for visualization"""
         self.mesh = mesh
+        self.invalidate()
+        
+        # Convert trimesh to faces for matplotlib once per mesh: one fancy index gives
+        # every triangle's corners as a single (F, 3, 3) array (single precision is
+        # plenty for drawing and halves the memory of large meshes)
+        self._mesh_triangles = None
+        if mesh is not None:
+            vertices = np.asarray(mesh.vertices, dtype=np.float32)
+            self._mesh_triangles = vertices[np.asarray(mesh.faces, dtype=np.intp)]
     
     def _plot_mesh(self) -> None:
         """Plot the 3D model mesh"""
         if self.mesh is None:
             return
             
-        # Convert trimesh to faces for matplotlib
-        vertices = self.mesh.vertices
-        faces = self.mesh.faces
-        
         # Create a Poly3DCollection
-        mesh_collection = Poly3DCollection(
-            [vertices[face] for face in faces],
+        self._mesh_collection = Poly3DCollection(
+            self._mesh_triangles,
             alpha=0.3,
             edgecolor='k',
             linewidth=0.1,
             facecolor='gray'
         )
-        self.ax.add_collection3d(mesh_collection)
+        self.ax.add_collection3d(self._mesh_collection)
     
     def _plot_components(self) -> None:
         """Plot the aircraft components"""
         self.component_markers = []
+        self.component_labels = []
+        components = self.model.components
+        if not components:
+            return
         
-        for comp in self.model.components:
-            # Get color from category or use component's color
-            color = self.category_colors.get(comp.category, comp.color)
-            
-            # Plot component as a cube
-            x, y, z = comp.location
-            dx, dy, dz = comp.size
-            
-            # Create cube vertices
-            vertices = [
-                [x - dx/2, y - dy/2, z - dz/2],
-                [x + dx/2, y - dy/2, z - dz/2],
-                [x + dx/2, y + dy/2, z - dz/2],
-                [x - dx/2, y + dy/2, z - dz/2],
-                [x - dx/2, y - dy/2, z + dz/2],
-                [x + dx/2, y - dy/2, z + dz/2],
-                [x + dx/2, y + dy/2, z + dz/2],
-                [x - dx/2, y + dy/2, z + dz/2]
-            ]
-            
-            # Define the faces using vertices
-            faces = [
-                [vertices[0], vertices[1], vertices[2], vertices[3]],  # bottom
-                [vertices[4], vertices[5], vertices[6], vertices[7]],  # top
-                [vertices[0], vertices[1], vertices[5], vertices[4]],  # front
-                [vertices[2], vertices[3], vertices[7], vertices[6]],  # back
-                [vertices[0], vertices[3], vertices[7], vertices[4]],  # left
-                [vertices[1], vertices[2], vertices[6], vertices[5]]   # right
-            ]
-            
-            # Create a Poly3DCollection for the component
-            component_collection = Poly3DCollection(
-                faces,
-                alpha=0.7,
-                edgecolor='k',
-                linewidth=0.5,
-                facecolor=color
-            )
-            self.ax.add_collection3d(component_collection)
-            self.component_markers.append(component_collection)
-            
-            # Add text label for component
-            self.ax.text(
-                x, y, z + dz/2,
+        # Plot each component as a cube, all six faces of every cube in one collection.
+        # The face array is kept so refresh_components can move/resize cubes in place
+        self._component_faces = self._cube_faces(self.model.locations, self.model.sizes)
+        component_collection = Poly3DCollection(
+            self._component_faces,
+            alpha=0.7,
+            edgecolor='k',
+            linewidth=0.5,
+            facecolor=self._component_facecolors(components)
+        )
+        self.ax.add_collection3d(component_collection)
+        self.component_markers.append(component_collection)
+        
+        # Add text label for each component, on top of its cube
+        for comp, position in zip(components, self._label_positions(self.model.locations, self.model.sizes)):
+            self.component_labels.append(self.ax.text(
+                *position,
                 comp.name,
                 fontsize=8,
                 ha='center',
                 va='bottom'
-            )
+            ))
+    
+    def refresh_components(self, sizes: Optional[np.ndarray] = None) -> None:
+        """
+        Move the plotted component cubes and labels to the model's current locations and
+        sizes (or the given (N, 3) sizes, e.g. partly drained tanks) without new artists,
+        and bring their names and colors up to date. Falls back to plotting them again if
+        the number of components changed.
+        """
+        locations = self.model.locations
+        if sizes is None:
+            sizes = self.model.sizes
+        
+        if len(self.component_labels) != len(locations) or not self.component_markers:
+            for artist in self.component_markers + self.component_labels:
+                artist.remove()
+            self._plot_components()
+            return
+        
+        components = self.model.components
+        self._cube_faces(locations, sizes, out=self._component_faces)
+        self.component_markers[0].set_verts(self._component_faces)
+        self.component_markers[0].set_facecolor(self._component_facecolors(components))
+        for label, comp, position in zip(self.component_labels, components,
+                                          self._label_positions(locations, sizes)):
+            label.set_text(comp.name)
+            label.set_position_3d(position)
+    
+    def _component_facecolors(self, components) -> list:
+        """Face colors of the component cubes: each component's category color (or its own), per face"""
+        colors = [self.category_colors.get(comp.category, comp.color) for comp in components]
+        return np.repeat(colors, len(_CUBE_FACES)).tolist()
+    
+    @staticmethod
+    def _cube_faces(locations: np.ndarray, sizes: np.ndarray,
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Quad faces of the cubes with the given (N, 3) centers and sizes as a (6N, 4, 3) array"""
+        # Corners of every cube at once, (N, 8, 3)
+        vertices = locations[:, None, :] + _CUBE_CORNERS[None, :, :] * (sizes / 2)[:, None, :]
+        if out is None:
+            out = np.empty((len(locations) * len(_CUBE_FACES), 4, 3))
+        np.take(vertices, _CUBE_FACES, axis=1, out=out.reshape(len(locations), len(_CUBE_FACES), 4, 3))
+        return out
+    
+    @staticmethod
+    def _label_positions(locations: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """Label anchor (top center) of each cube"""
+        positions = locations.copy()
+        positions[:, 2] += sizes[:, 2] / 2
+        return positions
     
     def _plot_cg(self) -> None:
         """Plot the center of gravity"""
         cg = self.model.calculate_cg()
         
         # Plot CG as a red sphere
-        self.cg_marker = self.ax.scatter(
+        self.cg_marker = self._overlay(self.ax.scatter(
             cg[0], cg[1], cg[2],
             color='red',
             s=100,
             marker='o',
             label='Center of Gravity'
-        )
+        ))
         
         # Add text label for CG
-        self.ax.text(
+        self._overlay(self.ax.text(
             cg[0], cg[1], cg[2] + 0.1,
             f"CG: ({cg[0]:.2f}, {cg[1]:.2f}, {cg[2]:.2f})",
             fontsize=10,
             ha='center',
             va='bottom',
             color='red'
-        )
+        ))
     
     def _plot_category_cg(self) -> None:
         """Plot the center of gravity for each category"""
@@ -136,41 +186,29 @@ class CGVisualizer:
             color = self.category_colors.get(category, "#e377c2")  # Default to pink
             
             # Plot category CG as a smaller sphere
-            self.ax.scatter(
+            self._overlay(self.ax.scatter(
                 cg[0], cg[1], cg[2],
                 color=color,
                 s=50,
                 marker='o',
                 label=f"{category.capitalize()} CG"
-            )
+            ))
     
     def _plot_reference_axes(self) -> None:
         """Plot reference axes"""
         # Get model bounds or use component bounds if no model
         if self.mesh is not None:
-            bounds = self.mesh.bounds
-            min_bound = bounds[0]
-            max_bound = bounds[1]
+            min_bound, max_bound = self.mesh.bounds
+        elif self.model.bounds is not None:
+            min_bound, max_bound = self.model.bounds
         else:
-            # Calculate bounds from components
-            if not self.model.components:
-                min_bound = np.array([-1, -1, -1])
-                max_bound = np.array([1, 1, 1])
-            else:
-                locations = np.array([comp.location for comp in self.model.components])
-                sizes = np.array([comp.size for comp in self.model.components])
-                
-                # Calculate min and max bounds
-                min_locations = locations - sizes/2
-                max_locations = locations + sizes/2
-                
-                min_bound = np.min(min_locations, axis=0)
-                max_bound = np.max(max_locations, axis=0)
-        
-        # Add some margin
+            min_bound = np.array([-1.0, -1.0, -1.0])
+            max_bound = np.array([1.0, 1.0, 1.0])
+        
+        # Add some margin (new arrays: both sources of bounds are read-only)
         margin = np.max(max_bound - min_bound) * 0.1
-        min_bound -= margin
-        max_bound += margin
+        min_bound = min_bound - margin
+        max_bound = max_bound + margin
         
         # Set axis limits
         self.ax.set_xlim(min_bound[0], max_bound[0])
@@ -185,16 +223,64 @@ class CGVisualizer:
         # Add a grid
         self.ax.grid(True)
     
-    def visualize_static(self) -> plt.Figure:
-        """Create a static visualization of the aircraft and CG"""
+    def _overlay(self, artist):
+        """Register a per-view artist so the next visualize_* call removes it"""
+        self._overlay_artists.append(artist)
+        return artist
+    
+    def _ensure_figure(self) -> None:
+        """Create the figure and 3D axes unless a previous view's are still open"""
+        if self.fig is not None and plt.fignum_exists(self.fig.number):
+            return
         self.fig = plt.figure(figsize=(12, 10))
         self.ax = self.fig.add_subplot(111, projection='3d')
+        self._mesh_collection = None
+        self.component_markers = []
+        self.component_labels = []
+        self._overlay_artists = []
+    
+    def _ensure_static_artists(self) -> None:
+        """
+        Plot the mesh, components and reference axes unless they are already on self.ax,
+        and clear the previous view's overlay. The mesh collection is the costly part to
+        rebuild, so it is kept for as long as the figure and mesh are.
+        """
+        for artist in self._overlay_artists:
+            artist.remove()
+        self._overlay_artists = []
+        if self.ax.get_legend() is not None:
+            self.ax.get_legend().remove()
+        
+        if self.mesh is not None and self._mesh_collection is None:
+            # Plot the mesh if available
+            self._plot_mesh()
+        
+        if not self.component_markers and not self.component_labels:
+            # Plot components
+            self._plot_components()
+        else:
+            # Follow components changed, added or removed since the last view
+            self.refresh_components()
         
-        # Plot the mesh if available
-        self._plot_mesh()
-        
-        # Plot components
-        self._plot_components()
+        # Plot reference axes (cheap, and the bounds may have changed)
+        self._plot_reference_axes()
+    
+    def invalidate(self) -> None:
+        """Close the current figure so the next visualize_* call builds it from scratch"""
+        if self.fig is not None:
+            plt.close(self.fig)
+        self.fig = None
+        self.ax = None
+        self.cg_marker = None
+        self._mesh_collection = None
+        self.component_markers = []
+        self.component_labels = []
+        self._overlay_artists = []
+    
+    def visualize_static(self) -> plt.Figure:
+        """Create a static visualization of the aircraft and CG"""
+        self._ensure_figure()
+        self._ensure_static_artists()
         
         # Plot CG
         self._plot_cg()
@@ -202,9 +288,6 @@ class CGVisualizer:
         # Plot category CGs
         self._plot_category_cg()
         
-        # Plot reference axes
-        self._plot_reference_axes()
-        
         # Add title
         self.ax.set_title(f"{self.model.aircraft_name} - Center of Gravity Analysis")
         
@@ -215,40 +298,33 @@ class CGVisualizer:
     
     def visualize_consumption(self, max_time: float = 5.0, steps: int = 50) -> FuncAnimation:
         """Create an animation showing CG shift during consumption"""
-        self.fig = plt.figure(figsize=(12, 10))
-        self.ax = self.fig.add_subplot(111, projection='3d')
-        
-        # Plot the mesh if available
-        self._plot_mesh()
-        
-        # Plot components (initial state)
-        self._plot_components()
-        
-        # Plot reference axes
-        self._plot_reference_axes()
+        self._ensure_figure()
+        self._ensure_static_artists()
         
         # Initialize CG marker
         initial_cg = self.model.calculate_cg()
-        self.cg_marker = self.ax.scatter(
+        self.cg_marker = self._overlay(self.ax.scatter(
             initial_cg[0], initial_cg[1], initial_cg[2],
             color='red',
             s=100,
             marker='o',
             label='Center of Gravity'
-        )
+        ))
         
         # Initialize CG path
         cg_path_x, cg_path_y, cg_path_z = [], [], []
         cg_path_line, = self.ax.plot([], [], [], 'r--', linewidth=1, alpha=0.5)
+        self._overlay(cg_path_line)
         
         # Initialize time text
-        time_text = self.ax.text2D(0.05, 0.95, '', transform=self.ax.transAxes)
+        time_text = self._overlay(self.ax.text2D(0.05, 0.95, '', transform=self.ax.transAxes))
         
         # Add title
         self.ax.set_title(f"{self.model.aircraft_name} - CG Shift During Consumption")
         
-        # Add legend
-        self.ax.legend()
+        # Add legend, pinned where loc="best" puts it for the first frame: the search for
+        # that spot scans every mesh face and would otherwise rerun on each frame
+        self._pin_legend(self.ax.legend())
         
         def update(frame):
             # Calculate time
@@ -279,6 +355,12 @@ class CGVisualizer:
         
         return anim
     
+    def _pin_legend(self, legend) -> None:
+        """Fix the legend at the position its automatic placement currently picks"""
+        self.fig.canvas.draw()
+        bbox = legend.get_window_extent().transformed(self.ax.transAxes.inverted())
+        legend.set_loc((bbox.x0, bbox.y0))
+    
     def save_static_visualization(self, filename: str) -> None:
         """Save the static visualization to a file"""
         # Create directory if it doesn't exist
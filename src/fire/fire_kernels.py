@@ -0,0 +1,78 @@
+import os
+import numpy as np
+
+try:
+    from numba import njit, prange
+    # NUMBA_DISABLE_JIT=1 makes the kernels plain Python, so prefer the NumPy paths then
+    USE_NUMBA = os.environ.get('NUMBA_DISABLE_JIT', '0') == '0'
+except ImportError:
+    # Numba is optional; callers check USE_NUMBA and fall back to their NumPy path
+    USE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so the kernels below can still be defined"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True)
+def spread_counts(spreading, suppressant, burning, humidity, fuel, wind_mults, base_prob, seed, out):
+    """
+    Add to out[i, j] how many spreading neighbors ignite cell (i, j) (see FireSystem._spread_fire).
+    wind_mults holds one multiplier per neighbor offset, in NEIGHBOR_OFFSETS order.
+    """
+    np.random.seed(seed)
+    n, m = burning.shape
+    for ti in range(n):
+        for tj in range(m):
+            if burning[ti, tj] or suppressant[ti, tj]:
+                continue
+            spread_prob = base_prob * (1 - humidity[ti, tj]) * fuel[ti, tj]
+
+            # Source cell is the target minus the offset
+            k = 0
+            for di in range(-1, 2):
+                for dj in range(-1, 2):
+                    if di == 0 and dj == 0:
+                        continue
+                    si = ti - di
+                    sj = tj - dj
+                    if 0 <= si < n and 0 <= sj < m and spreading[si, sj] and not suppressant[si, sj]:
+                        # The path midpoint lies in the even row/column of source and target
+                        mi = si if si % 2 == 0 else ti
+                        mj = sj if sj % 2 == 0 else tj
+                        if not suppressant[mi, mj] and np.random.random() < spread_prob * wind_mults[k]:
+                            out[ti, tj] += 1
+                    k += 1
+
+
+@njit(parallel=True, cache=True)
+def fill_frame(temperature, burning, fuel, suppressant, humidity, palette, ambient, max_temp,
+               shades, out):
+    """
+    Write into out[i, j] the palette color of cell (i, j) (see
+    FireVisualizer._create_visualization_matrix for the palette layout and precedence)
+    """
+    fire = 2 * shades * shades
+    n, m = burning.shape
+    for i in prange(n):
+        for j in range(m):
+            if suppressant[i, j] > 0:
+                index = fire + shades
+            elif burning[i, j] > 0:
+                index = fire + _shade((temperature[i, j] - ambient) / (max_temp - ambient), shades)
+            elif fuel[i, j] < 0.1:
+                index = fire + shades + 1
+            else:
+                index = (shades if humidity[i, j] > 0.6 else 0) + _shade(humidity[i, j], shades)
+                index = index * shades + _shade(fuel[i, j], shades)
+            for c in range(out.shape[2]):
+                out[i, j, c] = palette[index, c]
+
+
+@njit(cache=True)
+def _shade(value, shades):
+    """Shade bin (0 to shades - 1) of a value in [0, 1]"""
+    return int(min(max(value * shades, 0.0), shades - 1.0))
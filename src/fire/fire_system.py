@@ -1,8 +1,17 @@
 import numpy as np
 from perlin_noise import PerlinNoise
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple
 import random
+from fire_kernels import USE_NUMBA, spread_counts
+
+# Offsets (di, dj) of the 8 neighbors a burning cell can spread to
+NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# Direction of each offset in the meteorological convention (0 = North, clockwise
+# positive, in [0, 2pi)); the grid uses -j as North
+_SPREAD_DIRECTIONS = np.arctan2(-np.array(NEIGHBOR_OFFSETS)[:, 0], -np.array(NEIGHBOR_OFFSETS)[:, 1])
+_SPREAD_DIRECTIONS = np.where(_SPREAD_DIRECTIONS < 0, _SPREAD_DIRECTIONS + 2 * np.pi, _SPREAD_DIRECTIONS)
 
 @dataclass
 class WindConditions:
@@ -11,6 +20,9 @@ class WindConditions:
     base_speed: float # base wind speed without gusts
     base_direction: float # base wind direction
     last_wobble: float = 0  # Time tracker for wind direction changes
+    # spread_alignment() table and the direction it was computed for
+    _alignment: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    _alignment_direction: float = field(default=None, init=False, repr=False, compare=False)
     
     @classmethod
     def generate_initial(cls):
@@ -34,19 +46,37 @@ class WindConditions:
             max_variation = self.base_speed * 0.2  # 20% of base speed
             speed_change = random.uniform(-max_variation, max_variation)
             self.speed = np.clip(self.base_speed + speed_change, 0, 16 * 0.514)
+    
+    def spread_alignment(self) -> np.ndarray:
+        """
+        Alignment (cosine of the angle) between the wind direction and each of the
+        NEIGHBOR_OFFSETS spread directions. Recomputed only when the direction changes.
+        """
+        if self._alignment_direction != self.direction:
+            # Normalize wind direction to [0, 2π]
+            wind_direction = self.direction % (2 * np.pi)
+            
+            # Calculate smallest angle between directions
+            angle_diff = np.abs(_SPREAD_DIRECTIONS - wind_direction)
+            angle_diff = np.where(angle_diff > np.pi, 2 * np.pi - angle_diff, angle_diff)
+            
+            self._alignment = np.cos(angle_diff)
+            self._alignment_direction = self.direction
+        return self._alignment
 
 class FireSystem:
-    def __init__(self, grid_size: int = 150):
+    def __init__(self, grid_size: int = 150, seed: int = None):
         self.grid_size = grid_size
+        self.rng = np.random.default_rng(seed)  # Spread draws; seed for reproducible fires
         self.cell_size = 1.0  # meters
         self.time_per_step = 10.0  # seconds per frame
         
-        # Main grids
-        self.temperature_grid = np.zeros((grid_size, grid_size))
-        self.fuel_grid = np.zeros((grid_size, grid_size))
-        self.humidity_grid = np.zeros((grid_size, grid_size))
-        self.burning_grid = np.zeros((grid_size, grid_size))
-        self.suppressant_grid = np.zeros((grid_size, grid_size))
+        # Main grids (single precision is plenty for these values, and flags are bytes)
+        self.temperature_grid = np.zeros((grid_size, grid_size), dtype=np.float32)
+        self.fuel_grid = np.zeros((grid_size, grid_size), dtype=np.float32)
+        self.humidity_grid = np.zeros((grid_size, grid_size), dtype=np.float32)
+        self.burning_grid = np.zeros((grid_size, grid_size), dtype=np.uint8)
+        self.suppressant_grid = np.zeros((grid_size, grid_size), dtype=np.uint8)
         
         # Constants based on research (adjusted for 10-second timesteps)
         self.IGNITION_TEMP = 300
@@ -67,6 +97,10 @@ class FireSystem:
         self.grid_center = (grid_size // 2, grid_size // 2)  # Store grid center
         self.initial_suppressant_point = None  # Track where we started dropping
         
+        # Bumped whenever start_fire, update or deploy_suppressants changes the grids, so
+        # views can skip redrawing a state they have already drawn
+        self.state_version = 0
+        
         self._initialize_terrain()
     
     def _initialize_terrain(self):
@@ -75,192 +109,198 @@ class FireSystem:
         terrain_noise = PerlinNoise(octaves=4, seed=1)
         moisture_noise = PerlinNoise(octaves=3, seed=2)
         
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                # Use larger scale for more distinct patterns
-                nx = i / 50  # Increased scale for more visible patterns
-                ny = j / 50
-                
-                # Generate base terrain with more contrast
-                terrain = terrain_noise([nx, ny])
-                moisture = moisture_noise([nx * 1.5, ny * 1.5])  # Slightly different scale
-                
-                # Normalize and enhance contrast
-                terrain = self._normalize_noise(terrain, 0.3, 1.0)
-                moisture = self._normalize_noise(moisture, 0.2, 0.9)
-                
-                # Create more distinct patterns
-                self.humidity_grid[i, j] = moisture
-                self.fuel_grid[i, j] = terrain * (1 - moisture * 0.6)  # Less moisture impact
+        # Use larger scale for more distinct patterns
+        coords = np.arange(self.grid_size) / 50  # Increased scale for more visible patterns
+        
+        # Generate base terrain with more contrast
+        terrain = self._noise_grid(terrain_noise, coords, coords)
+        moisture = self._noise_grid(moisture_noise, coords * 1.5, coords * 1.5)  # Slightly different scale
+        
+        # Normalize and enhance contrast
+        terrain = self._normalize_noise(terrain, 0.3, 1.0)
+        moisture = self._normalize_noise(moisture, 0.2, 0.9)
+        
+        # Create more distinct patterns
+        self.humidity_grid[:] = moisture
+        self.fuel_grid[:] = terrain * (1 - moisture * 0.6)  # Less moisture impact
     
-    def _normalize_noise(self, value: float, min_val: float, max_val: float) -> float:
+    @staticmethod
+    def _noise_grid(noise: PerlinNoise, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Evaluate noise([x, y]) for every x in xs and y in ys as a (len(xs), len(ys)) array.
+        Uses the same lattice gradients and fade weighting as PerlinNoise, but sums the
+        four corner contributions for the whole grid at once.
+        """
+        x = xs * noise.octaves
+        y = ys * noise.octaves
+        x0 = np.floor(x).astype(int)
+        y0 = np.floor(y).astype(int)
+        
+        # Gradient vector of every lattice corner the grid touches (a few hundred at most)
+        x_min, y_min = x0.min(), y0.min()
+        gradients = np.array([[noise.get_from_cache_of_create_new((int(cx), int(cy))).vec
+                               for cy in range(y_min, y0.max() + 2)]
+                              for cx in range(x_min, x0.max() + 2)])
+        
+        def fade(t):
+            return 6 * t**5 - 15 * t**4 + 10 * t**3
+        
+        values = np.zeros((len(xs), len(ys)))
+        for ox in (0, 1):
+            dx = x - (x0 + ox)
+            for oy in (0, 1):
+                dy = y - (y0 + oy)
+                corner = gradients[(x0 + ox - x_min)[:, None], (y0 + oy - y_min)[None, :]]
+                weight = fade(1 - np.abs(dx))[:, None] * fade(1 - np.abs(dy))[None, :]
+                values += weight * (corner[..., 0] * dx[:, None] + corner[..., 1] * dy[None, :])
+        return values
+    
+    def _normalize_noise(self, value: np.ndarray, min_val: float, max_val: float) -> np.ndarray:
         """Normalize noise value to desired range"""
         return min_val + (max_val - min_val) * (value + 1) / 2
     
     def start_fire(self, position: Tuple[int, int], radius: int = 10):
         """Start a fire at given position with specified radius (default 10m for 20x20m square)"""
         x, y = position
-        for i in range(-radius, radius + 1):
-            for j in range(-radius, radius + 1):
-                if i*i + j*j <= radius*radius:  # Circular fire
-                    xi, yj = x + i, y + j
-                    if 0 <= xi < self.grid_size and 0 <= yj < self.grid_size:
-                        self.temperature_grid[xi, yj] = self.MAX_TEMP
-                        self.burning_grid[xi, yj] = 1.0
+        rows, cols = np.ogrid[:self.grid_size, :self.grid_size]
+        circle = (rows - x)**2 + (cols - y)**2 <= radius*radius  # Circular fire, clipped to the grid
+        self.temperature_grid[circle] = self.MAX_TEMP
+        self.burning_grid[circle] = 1
+        self.state_version += 1
 
     def update(self, wind: WindConditions, dt: float = 10.0):
         """Update fire state including suppressant effects"""
-        new_temp = np.copy(self.temperature_grid)
-        new_burning = np.copy(self.burning_grid)
-        
-        # Check suppressant effects first
-        burning_locations = np.where(self.burning_grid > 0)
-        for i, j in zip(*burning_locations):
-            # Check non-diagonal neighbors for suppressant
-            neighbors = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-            for di, dj in neighbors:
-                ni, nj = i + di, j + dj
-                if (0 <= ni < self.grid_size and 0 <= nj < self.grid_size and 
-                    self.suppressant_grid[ni, nj] > 0):
-                    new_burning[i, j] = 0
-                    new_temp[i, j] = self.AMBIENT_TEMP
-                    break
-        
-        # Update burning state and spread fire
-        burning_locations = np.where(self.burning_grid > 0)
-        for i, j in zip(*burning_locations):
-            # Consume fuel
-            self.fuel_grid[i, j] = max(0, self.fuel_grid[i, j] - self.FUEL_CONSUMPTION_RATE)
+        # The grids are updated in place; everything that depends on the state at the
+        # start of the step reads this mask instead
+        burning = self.burning_grid > 0
+        if burning.any():
+            # Burning cells always consume fuel; without any, nothing below changes
+            self.state_version += 1
+        
+        # Suppressant grid padded by one empty cell, so each neighbour is a plain slice
+        suppressant = np.pad(self.suppressant_grid > 0, 1)
+        
+        # Check suppressant effects first: burning cells with a non-diagonal
+        # suppressant neighbor are put out
+        near_suppressant = np.zeros_like(burning)
+        for di, dj in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            near_suppressant |= self._neighbors(suppressant, di, dj)
+        
+        # Consume fuel and stop burning if no fuel
+        self.fuel_grid[burning] = np.maximum(0, self.fuel_grid[burning] - self.FUEL_CONSUMPTION_RATE)
+        spreading = burning & (self.fuel_grid > 0)
+        
+        # Spread fire to neighbors (quenched cells still spread this step); every
+        # successful spread into a cell heats it by 300
+        ignitions = self._spread_fire(spreading, burning, suppressant, wind)
+        ignited = ignitions > 0
+        self.temperature_grid[ignited] = np.minimum(
+            self.MAX_TEMP, self.temperature_grid[ignited] + 300 * ignitions[ignited])
+        self.burning_grid[ignited & (self.temperature_grid >= self.IGNITION_TEMP)] = 1
+        
+        # Quenched and burnt-out cells stop burning and drop to ambient, which is
+        # also the cooling floor
+        extinguished = burning & (near_suppressant | ~spreading)
+        self.burning_grid[extinguished] = 0
+        self.temperature_grid[extinguished] = self.AMBIENT_TEMP
+    
+    def _spread_fire(self, spreading: np.ndarray, burning: np.ndarray, suppressant: np.ndarray,
+                     wind: WindConditions) -> np.ndarray:
+        """
+        Calculate fire spread with realistic rates based on research. Each cell in the
+        spreading mask tries each of its non-burning neighbors once; returns how many of
+        those attempts succeeded per cell. suppressant is the padded suppressant mask.
+        """
+        n = self.grid_size
+        base_prob = (self.BASE_SPREAD_RATE * self.time_per_step) / 60.0
+        wind_mults = self._wind_multipliers(wind)
+        
+        if USE_NUMBA:
+            # The kernel draws from Numba's own generator, seeded from self.rng so the
+            # system's seed still applies
+            ignitions = np.zeros((n, n), dtype=np.intp)
+            spread_counts(spreading, suppressant[1:-1, 1:-1], burning,
+                          self.humidity_grid, self.fuel_grid, wind_mults, base_prob,
+                          int(self.rng.integers(0, 2**31 - 1)), ignitions)
+            return ignitions
+        
+        # Cells outside the grid count as burning, so nothing spreads off the edge
+        target_burning = np.pad(burning, 1, constant_values=True)
+        # Environmental factors of each cell as a spread target
+        target_factor = np.pad((1 - self.humidity_grid) * self.fuel_grid, 1)
+        
+        # Parity of each cell's row and column (see the diagonal case below)
+        rows_even = (np.arange(n) % 2 == 0)[:, None]
+        cols_even = (np.arange(n) % 2 == 0)[None, :]
+        
+        # One uniform draw per cell and direction, generated in a single call
+        draws = self.rng.random((len(NEIGHBOR_OFFSETS), n, n), dtype=np.float32)
+        
+        ignitions = np.zeros((n + 2, n + 2), dtype=np.intp)
+        for (di, dj), wind_mult, draw in zip(NEIGHBOR_OFFSETS, wind_mults, draws):
+            # Check if there's a suppressant in the path: at the source, at the target
+            # and, for diagonals, at the midpoint, which rounds half to even and so lands
+            # on the corner cell in the even row/column
+            blocked = suppressant[1:-1, 1:-1] | self._neighbors(suppressant, di, dj)
+            if di and dj:
+                blocked |= rows_even & ~cols_even & self._neighbors(suppressant, 0, dj)
+                blocked |= ~rows_even & cols_even & self._neighbors(suppressant, di, 0)
             
-            # Stop burning if no fuel
-            if self.fuel_grid[i, j] <= 0:
-                new_burning[i, j] = 0
-                new_temp[i, j] = self.AMBIENT_TEMP
-            else:
-                # Spread fire to neighbors
-                self._spread_fire(i, j, wind, new_temp, new_burning)
-                
-            # Cooling
-            if new_burning[i, j] == 0:
-                new_temp[i, j] = max(self.AMBIENT_TEMP,
-                                   new_temp[i, j] - self.COOLING_RATE)
-        
-        self.temperature_grid = new_temp
-        self.burning_grid = new_burning
+            spread_prob = base_prob * wind_mult * self._neighbors(target_factor, di, dj)
+            spread = (spreading & ~blocked & ~self._neighbors(target_burning, di, dj) &
+                      (draw < spread_prob))
+            ignitions[1 + di:n + 1 + di, 1 + dj:n + 1 + dj] += spread
+        
+        return ignitions[1:-1, 1:-1]
     
-    def _spread_fire(self, i: int, j: int, wind: WindConditions, 
-                    new_temp: np.ndarray, new_burning: np.ndarray):
-        """Calculate fire spread with realistic rates based on research"""
-        for di in [-1, 0, 1]:
-            for dj in [-1, 0, 1]:
-                if di == 0 and dj == 0:
-                    continue
-                    
-                ni, nj = i + di, j + dj
-                if not (0 <= ni < self.grid_size and 0 <= nj < self.grid_size):
-                    continue
-                
-                # Check if there's a suppressant in the path
-                if self._check_suppressant_line(i, j, ni, nj):
-                    continue
-                
-                base_prob = (self.BASE_SPREAD_RATE * self.time_per_step) / 60.0
-                
-                # Wind speed categories and multipliers (based on research)
-                wind_speed_knots = wind.speed / 0.514
-                if wind_speed_knots < 5:
-                    speed_mult = 1.0
-                elif wind_speed_knots < 10:
-                    speed_mult = 3.0
-                else:
-                    speed_mult = 8.0
-                
-                # Wind alignment effect
-                wind_alignment = self._calculate_wind_alignment(di, dj, wind.direction)
-                if wind_alignment > 0.7:  # Downwind
-                    wind_mult = speed_mult
-                elif wind_alignment < -0.7:  # Upwind
-                    wind_mult = 0.01 / (1 + wind_speed_knots/5)  # Very unlikely against wind
-                else:  # Crosswind
-                    wind_mult = 0.1 * speed_mult  # Reduced from 0.4 to 0.1
-                
-                # Environmental factors
-                humidity_factor = 1 - self.humidity_grid[ni, nj]
-                fuel_factor = self.fuel_grid[ni, nj]
-                
-                spread_prob = base_prob * wind_mult * humidity_factor * fuel_factor
-                
-                if np.random.random() < spread_prob and self.burning_grid[ni, nj] == 0:
-                    new_temp[ni, nj] = min(self.MAX_TEMP, 
-                                         new_temp[ni, nj] + 300)
-                    if new_temp[ni, nj] >= self.IGNITION_TEMP:
-                        new_burning[ni, nj] = 1.0
-
-    def _check_suppressant_line(self, i1: int, j1: int, i2: int, j2: int) -> bool:
-        """Check if there's a suppressant between two points"""
-        # Check points along the line between the two cells
-        points = np.linspace((i1, j1), (i2, j2), 5)
-        for i, j in points:
-            ii, jj = int(round(i)), int(round(j))
-            if self.suppressant_grid[ii, jj]:
-                return True
-        return False
+    def _wind_multipliers(self, wind: WindConditions) -> np.ndarray:
+        """Spread rate multiplier for each of the NEIGHBOR_OFFSETS directions"""
+        # Wind speed categories and multipliers (based on research)
+        wind_speed_knots = wind.speed / 0.514
+        if wind_speed_knots < 5:
+            speed_mult = 1.0
+        elif wind_speed_knots < 10:
+            speed_mult = 3.0
+        else:
+            speed_mult = 8.0
+        
+        # Wind alignment effect
+        wind_alignment = wind.spread_alignment()
+        return np.select([wind_alignment > 0.7,    # Downwind
+                          wind_alignment < -0.7],  # Upwind
+                         [speed_mult,
+                          0.01 / (1 + wind_speed_knots/5)],  # Very unlikely against wind
+                         0.1 * speed_mult)  # Crosswind, reduced from 0.4 to 0.1
     
-    def _calculate_wind_alignment(self, di: int, dj: int, wind_direction: float) -> float:
-        """Calculate alignment between spread direction and wind direction"""
-        if di == 0 and dj == 0:
-            return 0
-        
-        # Convert to meteorological convention (0° = North, clockwise positive)
-        # Note: Grid uses -j as North direction
-        spread_direction = np.arctan2(-di, -dj)  # Convert to meteorological convention
-        if spread_direction < 0:
-            spread_direction += 2 * np.pi
-        
-        # Normalize wind direction to [0, 2π]
-        wind_direction = wind_direction % (2 * np.pi)
-        
-        # Calculate smallest angle between directions
-        angle_diff = abs(spread_direction - wind_direction)
-        if angle_diff > np.pi:
-            angle_diff = 2 * np.pi - angle_diff
-        
-        # Return cosine of angle difference
-        return np.cos(angle_diff)
+    @staticmethod
+    def _neighbors(padded: np.ndarray, di: int, dj: int) -> np.ndarray:
+        """View of a one-cell padded grid giving each cell's (di, dj) neighbor"""
+        rows, cols = padded.shape
+        return padded[1 + di:rows - 1 + di, 1 + dj:cols - 1 + dj]
     
     def deploy_suppressants(self, wind: WindConditions):
         """Deploy suppressants focusing on fire expansion direction"""
         if self.suppressant_count >= 40:
             return
         
-        burning_locations = np.where(self.burning_grid > 0)
-        if len(burning_locations[0]) == 0:
+        burning_i, burning_j = np.where(self.burning_grid > 0)
+        if len(burning_i) == 0:
             return
         
         # Calculate center of fire mass
-        center_i = np.mean(burning_locations[0])
-        center_j = np.mean(burning_locations[1])
-        
-        # Calculate point furthest in wind direction
-        max_projection = float('-inf')
-        furthest_point = None
+        center_i = burning_i.mean()
+        center_j = burning_j.mean()
         
         # Wind direction vector (meteorological convention)
         wind_i = -np.sin(wind.direction)
         wind_j = -np.cos(wind.direction)
         
-        # Find furthest burning point in wind direction
-        for i, j in zip(*burning_locations):
-            projection = (i - center_i) * wind_i + (j - center_j) * wind_j
-            if projection > max_projection:
-                max_projection = projection
-                furthest_point = (i, j)
-        
-        if furthest_point is None:
-            return
+        # Find furthest burning point in wind direction (the first one on ties)
+        projection = (burning_i - center_i) * wind_i + (burning_j - center_j) * wind_j
+        furthest = np.argmax(projection)
         
         # Place line 12 meters ahead in wind direction
-        fi, fj = furthest_point
+        fi, fj = burning_i[furthest], burning_j[furthest]
         start_i = int(fi + wind_i * 12)
         start_j = int(fj + wind_j * 12)
         
@@ -291,4 +331,5 @@ class FireSystem:
                     if (0 <= ni < self.grid_size and 
                         0 <= nj < self.grid_size):
                         self.suppressant_grid[ni, nj] = 1
-                self.suppressant_count += 1
\ No newline at end of file
+                self.suppressant_count += 1
+                self.state_version += 1
\ No newline at end of file
@@ -1,4 +1,6 @@
 import argparse
+import multiprocessing
+import matplotlib
 from fire_system import FireSystem, WindConditions
 from visualization import FireVisualizer
 import matplotlib.pyplot as plt
@@ -9,8 +11,7 @@ from PIL import Image
 
 def create_image_grid(image_files, output_path, grid_size=None):
     """Create a grid of images from the given files"""
-    images = [Image.open(f) for f in image_files]
-    n = len(images)
+    n = len(image_files)
     
     if grid_size is None:
         # Calculate grid dimensions
@@ -19,15 +20,17 @@ def create_image_grid(image_files, output_path, grid_size=None):
     else:
         rows, cols = grid_size
     
-    # Create blank image
-    w, h = images[0].size
+    # Create blank image, sized from the first image
+    with Image.open(image_files[0]) as img:
+        w, h = img.size
     grid = Image.new('RGB', (w * cols, h * rows))
     
-    # Paste images into grid
-    for idx, img in enumerate(images):
+    # Paste images into grid, one open image at a time
+    for idx, f in enumerate(image_files):
         i = idx // cols
         j = idx % cols
-        grid.paste(img, (j * w, i * h))
+        with Image.open(f) as img:
+            grid.paste(img, (j * w, i * h))
     
     grid.save(output_path)
 
@@ -36,7 +39,13 @@ def create_gif_grid(gif_files, output_path, grid_size=None):
     print(f"Creating animation grid from {len(gif_files)} files...")
     
     try:
-        gifs = [imageio.get_reader(f) for f in gif_files]
+        # Decode every input once, as (frames, h, w, 3) arrays without alpha
+        gifs = [np.stack(imageio.mimread(f, memtest=False))[..., :3] for f in gif_files]
+        
+        # Play the grid at the inputs' frame rate
+        with imageio.get_reader(gif_files[0]) as reader:
+            duration = reader.get_meta_data().get('duration', 1000 / 30)  # ms per frame
+        
         n = len(gifs)
         
         if grid_size is None:
@@ -46,59 +55,65 @@ def create_gif_grid(gif_files, output_path, grid_size=None):
         else:
             rows, cols = grid_size
         
-        # Get first frame to determine dimensions
-        first_frames = [gif.get_next_data() for gif in gifs]
-        h, w = first_frames[0].shape[:2]
+        # Stack into one (rows * cols, frames, h, w, 3) array, with blank frames past the end
+        # of shorter GIFs and for the empty grid cells
+        num_frames = max(len(gif) for gif in gifs)
+        h, w = gifs[0].shape[1:3]
+        for f, gif in zip(gif_files, gifs):
+            if gif.shape[1:3] != (h, w):
+                raise ValueError(f"{f} has {gif.shape[2]}x{gif.shape[1]} frames, expected {w}x{h}")
+        all_frames = np.zeros((rows * cols, num_frames, h, w, 3), dtype=np.uint8)
+        for idx, gif in enumerate(gifs):
+            all_frames[idx, :len(gif)] = gif
+        del gifs
+        print(f"Processing {num_frames} frames...")
         
         # Create writer for output gif
-        writer = imageio.get_writer(output_path, fps=30)
-        
-        # Reset gif readers
-        gifs = [imageio.get_reader(f) for f in gif_files]
+        writer = imageio.get_writer(output_path, mode='I', duration=duration)
         
-        # Get total number of frames from first gif
-        num_frames = len(gifs[0])
-        print(f"Processing {num_frames} frames...")
+        # Grid frame buffer, reused for every frame; tiles[i, :, j] is the tile at row i, column j
+        grid_frame = np.empty((rows * h, cols * w, 3), dtype=np.uint8)
+        tiles = grid_frame.reshape(rows, h, cols, w, 3)
         
         # Process each frame
         for frame_idx in range(num_frames):
             if frame_idx % 10 == 0:  # Progress update every 10 frames
                 print(f"Processing frame {frame_idx}/{num_frames}")
-                
-            frames = []
-            for gif in gifs:
-                try:
-                    if frame_idx < len(gif):
-                        frame = gif.get_next_data()
-                        # Convert RGBA to RGB if necessary
-                        if frame.shape[-1] == 4:
-                            frame = frame[..., :3]
-                        frames.append(frame)
-                    else:
-                        frames.append(np.zeros((h, w, 3), dtype=np.uint8))
-                except Exception as e:
-                    print(f"Error reading frame: {e}")
-                    frames.append(np.zeros((h, w, 3), dtype=np.uint8))
             
-            # Create grid frame
-            grid_frame = np.zeros((h * rows, w * cols, 3), dtype=np.uint8)
-            for idx, frame in enumerate(frames):
-                i = idx // cols
-                j = idx % cols
-                grid_frame[i*h:(i+1)*h, j*w:(j+1)*w] = frame
+            # Fill grid frame: lay the (rows, cols) tiles out row-major in one copy
+            tiles[:] = all_frames[:, frame_idx].reshape(rows, cols, h, w, 3).transpose(0, 2, 1, 3, 4)
             
             writer.append_data(grid_frame)
         
         print("Finalizing animation grid...")
         writer.close()
-        for gif in gifs:
-            gif.close()
         print(f"Animation grid saved to {output_path}")
         
     except Exception as e:
         print(f"Error creating animation grid: {e}")
         raise
 
+def run_simulation(i, num_runs):
+    """Run simulation i (of num_runs) and return its (GIF, final state image) file names"""
+    # Workers only render to files
+    matplotlib.use('Agg')
+    print(f"Running simulation {i+1}/{num_runs}")
+    
+    # Initialize fire system
+    fire_system = FireSystem(grid_size=150)
+    fire_system.start_fire((75, 75), radius=10)
+    
+    # Create visualizer and run animation
+    visualizer = FireVisualizer(fire_system)
+    
+    # Set unique filenames for this run using subdirectories
+    gif_name = f'outputs/fire_simulations/fire_spread_{i}.gif'
+    final_state_name = f'outputs/fire_simulations/fire_final_state_{i}.png'
+    
+    visualizer.animate_fire(gif_name=gif_name, final_state_name=final_state_name)
+    print(f"Completed simulation {i+1}")
+    return gif_name, final_state_name
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-n', '--num_runs', type=int, default=1,
@@ -109,28 +124,13 @@ def main():
     os.makedirs('outputs/fire_simulations', exist_ok=True)
     os.makedirs('outputs/fire_grids', exist_ok=True)
     
-    gif_files = []
-    final_state_files = []
-    
-    for i in range(args.num_runs):
-        print(f"Running simulation {i+1}/{args.num_runs}")
-        
-        # Initialize fire system
-        fire_system = FireSystem(grid_size=150)
-        fire_system.start_fire((75, 75), radius=10)
-        
-        # Create visualizer and run animation
-        visualizer = FireVisualizer(fire_system)
-        
-        # Set unique filenames for this run using subdirectories
-        gif_name = f'outputs/fire_simulations/fire_spread_{i}.gif'
-        final_state_name = f'outputs/fire_simulations/fire_final_state_{i}.png'
-        
-        gif_files.append(gif_name)
-        final_state_files.append(final_state_name)
-        
-        visualizer.animate_fire(gif_name=gif_name, final_state_name=final_state_name)
-        print(f"Completed simulation {i+1}")
+    # Runs are independent, so spread them over the cores (at least one worker, so that
+    # -n 0 runs nothing as before; cpu_count() may be None)
+    processes = max(1, min(args.num_runs, os.cpu_count() or 1))
+    with multiprocessing.Pool(processes=processes) as pool:
+        results = pool.starmap(run_simulation, [(i, args.num_runs) for i in range(args.num_runs)])
+    gif_files = [gif_name for gif_name, _ in results]
+    final_state_files = [final_state_name for _, final_state_name in results]
     
     if args.num_runs > 1:
         print("\nCreating final grid layouts...")
@@ -1,74 +1,141 @@
+import math
+import queue
+import threading
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from matplotlib.patches import FancyArrowPatch
+from PIL import Image
 from fire_system import FireSystem, WindConditions
-from matplotlib import animation
+from fire_kernels import USE_NUMBA, fill_frame
 from pathlib import Path
 
+# Shades per axis of the color lookup tables (humidity x fuel for terrain, temperature for fire)
+_SHADES = 64
+
+# Palette layout: dry then humid terrain shades, the fire ramp, then suppressant and burnt
+_FIRE = 2 * _SHADES * _SHADES
+_SUPPRESSANT = _FIRE + _SHADES
+_BURNT = _SUPPRESSANT + 1
+
 class FireVisualizer:
     def __init__(self, fire_system: FireSystem):
         self.fire_system = fire_system
         # Create figure with extra space on right for legend
         self.fig, self.ax = plt.subplots(figsize=(14, 12))
         self.im = None
-        self.wind_arrow = None
-        self.wind_text = None
-        self.time_text = None
+        
+        # Fixed view of the grid without ticks or frame: fewer artists to draw every frame
+        n = fire_system.grid_size
+        self.ax.set_xlim(-0.5, n - 0.5)
+        self.ax.set_ylim(n - 0.5, -0.5)
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.ax.set_frame_on(False)
+        
+        # Wind arrow and text overlays, created once and updated in place by update_frame
+        self.wind_arrow = FancyArrowPatch(
+            (0, 0), (0, 0),
+            arrowstyle='fancy,head_length=0.8,head_width=0.6',
+            color='red',
+            linewidth=2,
+            zorder=5
+        )
+        self.ax.add_patch(self.wind_arrow)
+        self.wind_text = self.ax.text(
+            0.5, 1.05, '',
+            transform=self.ax.transAxes,
+            ha='center', va='bottom',
+            bbox=dict(facecolor='white', alpha=0.7)
+        )
+        self.time_text = self.ax.text(
+            0.02, 0.98, '',
+            transform=self.ax.transAxes,
+            color='white', fontsize=12,
+            bbox=dict(facecolor='black', alpha=0.7)
+        )
+        self._title = self.ax.set_title('')
         self.wind_conditions = WindConditions.generate_initial()
         self.elapsed_time = 0
         self.suppressant_phase = False
         self.final_countdown = False
+        # 8-bit RGB frame buffer, refilled in place every frame from the palette
+        self._palette = self._build_palette()
+        self._vis_buffer = np.empty((fire_system.grid_size, fire_system.grid_size, 3), dtype=np.uint8)
+        self._vis_version = None  # fire_system.state_version the buffer was drawn for
         # Adjust subplot parameters to make room for legend
         plt.subplots_adjust(right=0.85)
+        self._init_legend()
+    
+    def _init_legend(self):
+        """Add the (static) legend with clear positioning"""
+        self.ax.legend(
+            handles=[
+                plt.Rectangle((0,0),1,1, fc='white', label='Suppressant'),
+                plt.Rectangle((0,0),1,1, fc='red', label='Active Fire'),
+                plt.Rectangle((0,0),1,1, fc='black', label='Burnt Area'),
+                plt.Rectangle((0,0),1,1, fc='darkgreen', label='High Humidity'),
+                plt.Rectangle((0,0),1,1, fc='saddlebrown', label='Low Humidity')
+            ],
+            loc='center left',
+            bbox_to_anchor=(1.05, 0.5),
+            frameon=True,
+            title='Legend'
+        )
+        
+    @staticmethod
+    def _build_palette():
+        """8-bit RGB color of every palette index (see the layout constants above)"""
+        levels = (np.arange(_SHADES) + 0.5) / _SHADES  # Shade bin centers
+        humidity, fuel = np.meshgrid(levels, levels, indexing='ij')
+        
+        # Darker terrain coloring, for drier then high humidity areas
+        dry = [0.3 + (fuel * 0.3), 0.15 + (humidity * 0.2)]
+        humid = [0.2 + (0.1 * fuel), 0.25 + (humidity * 0.3)]
+        terrain = [np.stack([red.ravel(), green.ravel(), np.full(red.size, 0.05)], axis=-1)
+                   for red, green in (dry, humid)]
+        
+        # Red-yellow ramp for active fire, white for suppressant, black for burnt areas
+        fire = np.column_stack([np.ones(_SHADES), levels * 0.8, np.zeros(_SHADES)])
+        palette = np.vstack(terrain + [fire, [[1, 1, 1], [0, 0, 0]]])
+        return np.round(palette * 255).astype(np.uint8)
+    
+    @staticmethod
+    def _shade(values):
+        """Shade bin (0 to _SHADES - 1) of each value in [0, 1]"""
+        return np.clip(values * _SHADES, 0, _SHADES - 1).astype(np.intp)
+    
+    def _create_visualization_matrix(self, out=None):
+        """
+        Create visualization matrix with distinct terrain patterns and burnt areas, written
+        as 8-bit RGB into out (the visualizer's reusable frame buffer by default)
+        """
+        fs = self.fire_system
+        if out is None:
+            # The buffer is still current unless the fire system changed since it was drawn
+            if self._vis_version == fs.state_version:
+                return self._vis_buffer
+            self._vis_version = fs.state_version
+            out = self._vis_buffer
+        
+        if USE_NUMBA:
+            # One compiled pass writing each cell's color directly
+            fill_frame(fs.temperature_grid, fs.burning_grid, fs.fuel_grid, fs.suppressant_grid,
+                       fs.humidity_grid, self._palette, fs.AMBIENT_TEMP, fs.MAX_TEMP, _SHADES, out)
+            return out
         
-    def _create_visualization_matrix(self):
-        """Create visualization matrix with distinct terrain patterns and burnt areas"""
-        vis_matrix = np.zeros((self.fire_system.grid_size, 
-                             self.fire_system.grid_size, 4))
-        
-        # First pass: Create base terrain
-        for i in range(self.fire_system.grid_size):
-            for j in range(self.fire_system.grid_size):
-                humidity = self.fire_system.humidity_grid[i, j]
-                fuel = self.fire_system.fuel_grid[i, j]
-                
-                # Darker terrain coloring
-                if humidity > 0.6:  # High humidity areas
-                    green = 0.25 + (humidity * 0.3)  # Darker green
-                    brown = 0.2 + (0.1 * fuel)
-                else:  # Drier areas
-                    green = 0.15 + (humidity * 0.2)
-                    brown = 0.3 + (fuel * 0.3)
-                
-                vis_matrix[i, j] = [
-                    brown,  # Red (brown)
-                    green,  # Green (reduced)
-                    0.05,   # Blue (minimal tint)
-                    1.0     # Alpha
-                ]
-        
-        # Second pass: Overlay fire effects
-        for i in range(self.fire_system.grid_size):
-            for j in range(self.fire_system.grid_size):
-                temp = self.fire_system.temperature_grid[i, j]
-                burning = self.fire_system.burning_grid[i, j]
-                suppressant = self.fire_system.suppressant_grid[i, j]
-                
-                norm_temp = (temp - self.fire_system.AMBIENT_TEMP) / \
-                          (self.fire_system.MAX_TEMP - self.fire_system.AMBIENT_TEMP)
-                
-                if suppressant > 0:
-                    # White for suppressant
-                    vis_matrix[i, j] = [1, 1, 1, 1]
-                elif burning > 0:
-                    # Red-yellow for active fire
-                    vis_matrix[i, j] = [1, norm_temp * 0.8, 0, 1]
-                elif self.fire_system.fuel_grid[i, j] < 0.1:  # Burnt area (low fuel)
-                    # Black for burnt areas
-                    vis_matrix[i, j] = [0, 0, 0, 1]
-        
-        return vis_matrix
+        # Palette index of each cell: terrain shade by humidity and fuel, overlaid with fire
+        # effects (suppressant taking precedence over fire and fire over burnt)
+        terrain = ((fs.humidity_grid > 0.6) * _SHADES + self._shade(fs.humidity_grid)) * _SHADES \
+            + self._shade(fs.fuel_grid)
+        norm_temp = (fs.temperature_grid - fs.AMBIENT_TEMP) / (fs.MAX_TEMP - fs.AMBIENT_TEMP)
+        index = np.select(
+            [fs.suppressant_grid > 0, fs.burning_grid > 0, fs.fuel_grid < 0.1],
+            [_SUPPRESSANT, _FIRE + self._shade(norm_temp), _BURNT],
+            default=terrain
+        )
+        
+        # One gather from the palette gives the image
+        return np.take(self._palette, index, axis=0, out=out)
 
     def update_frame(self, frame):
         # Update elapsed time (10 seconds per frame)
@@ -98,12 +165,6 @@ class FireVisualizer:
         if self.suppressant_phase:
             self.fire_system.deploy_suppressants(self.wind_conditions)
         
-        # Clear previous arrow and text
-        if self.wind_arrow:
-            self.wind_arrow.remove()
-        if self.wind_text:
-            self.wind_text.remove()
-        
         # Update visualization matrix
         vis_matrix = self._create_visualization_matrix()
         
@@ -116,66 +177,43 @@ class FireVisualizer:
         center = self.fire_system.grid_size // 2
         arrow_length = 12 * (self.wind_conditions.speed / (16 * 0.514))
         # Add pi to direction to flip arrow
-        dx = arrow_length * np.cos(self.wind_conditions.direction + np.pi)
-        dy = arrow_length * np.sin(self.wind_conditions.direction + np.pi)
+        dx = arrow_length * math.cos(self.wind_conditions.direction + math.pi)
+        dy = arrow_length * math.sin(self.wind_conditions.direction + math.pi)
         
-        # Create fancy red arrow
-        self.wind_arrow = FancyArrowPatch(
-            (center, center),
-            (center + dx, center + dy),
-            arrowstyle='fancy,head_length=0.8,head_width=0.6',
-            color='red',
-            linewidth=2,
-            zorder=5
-        )
-        self.ax.add_patch(self.wind_arrow)
+        # Move the fancy red arrow
+        self.wind_arrow.set_positions((center, center), (center + dx, center + dy))
         
-        # Add wind information text
+        # Update wind information text
         wind_speed_knots = self.wind_conditions.speed / 0.514  # Convert m/s to knots
         base_speed_knots = self.wind_conditions.base_speed / 0.514
-        wind_deg = np.degrees(self.wind_conditions.direction)
-        self.wind_text = self.ax.text(
-            0.5, 1.05,
-            f'Wind: {wind_speed_knots:.1f} kts (Base: {base_speed_knots:.1f} kts)  @ {wind_deg:.0f}°',
-            transform=self.ax.transAxes,
-            ha='center', va='bottom',
-            bbox=dict(facecolor='white', alpha=0.7)
-        )
+        wind_deg = math.degrees(self.wind_conditions.direction)
+        self.wind_text.set_text(
+            f'Wind: {wind_speed_knots:.1f} kts (Base: {base_speed_knots:.1f} kts)  @ {wind_deg:.0f}°')
         
         # Update title with wind information
         base_speed_kts = self.wind_conditions.base_speed / 0.514
         current_speed_kts = self.wind_conditions.speed / 0.514
-        wind_deg = np.degrees(self.wind_conditions.direction)
+        wind_deg = math.degrees(self.wind_conditions.direction)
         
-        plt.title(f'Base Wind: {base_speed_kts:.1f}kts @ {wind_deg:.0f}°\n'
-                 f'Current Wind: {current_speed_kts:.1f}kts')
-        
-        # Update legend with clear positioning
-        legend = self.ax.legend(
-            handles=[
-                plt.Rectangle((0,0),1,1, fc='white', label='Suppressant'),
-                plt.Rectangle((0,0),1,1, fc='red', label='Active Fire'),
-                plt.Rectangle((0,0),1,1, fc='black', label='Burnt Area'),
-                plt.Rectangle((0,0),1,1, fc='darkgreen', label='High Humidity'),
-                plt.Rectangle((0,0),1,1, fc='saddlebrown', label='Low Humidity')
-            ],
-            loc='center left',
-            bbox_to_anchor=(1.05, 0.5),
-            frameon=True,
-            title='Legend'
-        )
+        self._title.set_text(f'Base Wind: {base_speed_kts:.1f}kts @ {wind_deg:.0f}°\n'
+                             f'Current Wind: {current_speed_kts:.1f}kts')
         
-        # Add or update time counter
-        if self.time_text:
-            self.time_text.remove()
-        self.time_text = self.ax.text(
-            0.02, 0.98, f'T+{self.elapsed_time//60:02d}:{self.elapsed_time%60:02d}',
-            transform=self.ax.transAxes,
-            color='white', fontsize=12,
-            bbox=dict(facecolor='black', alpha=0.7)
-        )
+        # Update time counter
+        self.time_text.set_text(f'T+{self.elapsed_time//60:02d}:{self.elapsed_time%60:02d}')
         
-        return [self.im, self.wind_arrow, self.wind_text, self.time_text, legend]
+        return [self.im, self.wind_arrow, self.wind_text, self.time_text, self._title]
+    
+    def _gif_palette(self, image):
+        """
+        GIF palette image: the fire ramp, suppressant and burnt colors, which the first
+        frame may not show yet, plus an adaptive palette of the image for the terrain,
+        text and decorations
+        """
+        fixed = self._palette[_FIRE:]
+        adaptive = image.quantize(colors=256 - len(fixed)).getpalette()[:3 * (256 - len(fixed))]
+        palette = Image.new('P', (1, 1))
+        palette.putpalette(fixed.tobytes() + bytes(adaptive))
+        return palette
     
     def save_final_image(self):
         """Save final state with automatic numbering"""
@@ -199,30 +237,68 @@ class FireVisualizer:
         plt.savefig(filename, bbox_inches='tight', dpi=300)
         print(f"Final state saved as: {filename}")
 
-    def animate_fire(self, gif_name='outputs/fire_spread.gif', final_state_name='outputs/fire_final_state.png'):
-        """Animate fire spread for 10 minutes"""
+    def animate_fire(self, gif_name='outputs/fire_spread.gif', final_state_name='outputs/fire_final_state.png',
+                     dpi=60, figsize=(14, 12)):
+        """
+        Animate fire spread for 10 minutes. The GIF frames are rendered at dpi: the GIF is
+        quantized to 256 colors anyway, and encoding cost grows with the pixel count.
+        """
         # Create outputs directory if it doesn't exist
         import os
         os.makedirs('outputs', exist_ok=True)
         
         # Set a fixed DPI and figure size
-        self.fig.set_dpi(100)
-        self.fig.set_size_inches(14, 12)
+        self.fig.set_dpi(dpi)
+        self.fig.set_size_inches(*figsize)
         
-        # Create animation
-        anim = FuncAnimation(self.fig, self.update_frame,
-                           frames=60, interval=100,
-                           blit=True)
-        
-        # Use PillowWriter for GIF creation
-        writer = animation.PillowWriter(fps=30)
-        anim.save(gif_name, writer=writer)
+        # Render the 60 frames here while a writer thread quantizes the previous ones. The
+        # writer keeps draining the queue after a failure, so put() cannot block forever;
+        # rendering stops early and the writer's exception is raised here
+        frames = queue.Queue(maxsize=8)
+        errors = []
+        writer = threading.Thread(target=self._write_gif, args=(frames, gif_name, 30, errors))
+        writer.start()
+        try:
+            for frame in range(60):
+                if errors:
+                    break
+                self.update_frame(frame)
+                self.fig.canvas.draw()
+                frames.put(np.asarray(self.fig.canvas.buffer_rgba()).copy())
+        finally:
+            frames.put(None)
+            writer.join()
+        if errors:
+            raise errors[0]
         
         # Save final state
         plt.savefig(final_state_name, bbox_inches='tight', dpi=300)
         
         plt.close()  # Close the figure to free memory
-        return anim
+    
+    def _write_gif(self, frames, gif_name, fps, errors):
+        """
+        Quantize the RGBA frames taken from the queue until None, then save them as a GIF.
+        All frames share one palette, built from the first frame: the scene's colors hardly
+        change, so later frames only need a nearest-color lookup, and with one global
+        palette PIL stores just the changed rectangle of each frame. A failure is appended
+        to errors, and the remaining frames are drained (and dropped) until None.
+        """
+        images = []
+        palette = None
+        try:
+            while (frame := frames.get()) is not None:
+                image = Image.fromarray(frame).convert('RGB')
+                if palette is None:
+                    palette = self._gif_palette(image)
+                images.append(image.quantize(palette=palette, dither=Image.Dither.NONE))
+            if images:
+                images[0].save(gif_name, save_all=True, append_images=images[1:],
+                               duration=int(1000 / fps), loop=0)
+        except BaseException as e:
+            errors.append(e)
+            while frame is not None:
+                frame = frames.get()
 
     def save_outputs(self):
         """Save final state and animation"""
@@ -1,5 +1,5 @@
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+import imageio
 import numpy as np
 import os
 
@@ -19,6 +19,20 @@ ACTUAL_DROP_TIME = 1.0  # seconds for actual dropping motion
 DROP_MARGIN = 0.5  # seconds before and after drop
 PAYLOAD_RADIUS = (4.5/12) / 2  # Convert 4.5 inches to feet radius
 PAYLOAD_OFFSET = FUSELAGE_DIAMETER/2 - 0.2  # Adjusted offset for larger fuselage
+NUM_SLOTS = 4
+SLOT_ANGLES = np.linspace(-np.pi/2, 3*np.pi/2, NUM_SLOTS, endpoint=False)  # Start from bottom
+SLOT_COS = np.cos(SLOT_ANGLES)  # Unrotated slot directions, rotated per frame in draw_launcher
+SLOT_SIN = np.sin(SLOT_ANGLES)
+
+# Per drop cycle: (launcher angle while dropping, empty-slot mask before the drop, mask
+# after it, rotation start angle, rotation sweep, rotation duration in seconds). Bit i of
+# a mask is set when slot i is empty.
+CYCLE_SPEC = (
+    (0.0,         0b0000, 0b0001, 0.0,         np.pi,   2.0),
+    (np.pi,       0b0100, 0b0101, np.pi,       np.pi/2, 1.0),
+    (3*np.pi/2,   0b0101, 0b1011, 0.0,         np.pi,   2.0),  # Rotation starts from the top position
+    (5*np.pi/2,   0b1111, 0b1111, 5*np.pi/2,   0.0,     1.0),  # All dropped, no rotation
+)
 
 # Initialize the plot
 fig, ax = plt.subplots()
@@ -48,125 +62,96 @@ def draw_fuselage():
     shaft = plt.Circle((0, 0), SHAFT_DIAMETER / 2, color='red', fill=True)
     ax.add_artist(shaft)
 
-def draw_launcher(angle, empty_slots, drop_payload_data):
-    # Draw the rotary launcher (blue, rotating)
+def create_launcher():
+    # Draw the rotary launcher (blue) and create the payload, falling payload and time
+    # artists once; draw_launcher only moves and recolors them each frame
     launcher = plt.Circle((0, 0), FUSELAGE_DIAMETER/2 - 0.1, color='blue', fill=True, alpha=0.6)
     ax.add_artist(launcher)
 
-    # Draw the payload slots
-    num_slots = 4
-    angles = np.linspace(-np.pi/2, 3*np.pi/2, num_slots, endpoint=False)  # Start from bottom
-    for i, slot_angle in enumerate(angles):
-        x = PAYLOAD_OFFSET * np.cos(slot_angle + angle)
-        y = PAYLOAD_OFFSET * np.sin(slot_angle + angle)
-
-        if i in empty_slots:
-            # Empty slot
-            payload = plt.Circle((x, y), PAYLOAD_RADIUS, color='white', fill=True)
-            ax.add_artist(payload)
-        else:
-            # Filled payload
-            payload = plt.Circle((x, y), PAYLOAD_RADIUS, color='orange', fill=True)
-            ax.add_artist(payload)
+    slots = []
+    for _ in range(NUM_SLOTS):
+        payload = plt.Circle((0, 0), PAYLOAD_RADIUS, color='orange', fill=True)
+        ax.add_artist(payload)
+        slots.append(payload)
+
+    drop = plt.Circle((0, 0), PAYLOAD_RADIUS, color='orange', fill=True, visible=False)
+    ax.add_artist(drop)
+
+    time_label = ax.text(0, -FUSELAGE_DIAMETER - 0.8, '', fontsize=12, ha='center')
+    return slots, drop, time_label
 
-    # Draw falling payload if exists
+def draw_launcher(angle, empty_mask, drop_payload_data):
+    # Position the payload slots on the rotating launcher (one rotation of the slot table)
+    c, s = np.cos(angle), np.sin(angle)
+    xs = PAYLOAD_OFFSET * (SLOT_COS * c - SLOT_SIN * s)
+    ys = PAYLOAD_OFFSET * (SLOT_COS * s + SLOT_SIN * c)
+    for i in range(NUM_SLOTS):
+        slot_patches[i].center = (xs[i], ys[i])
+        # Empty slots (bit i of empty_mask set) are white, filled payloads orange
+        slot_patches[i].set_color('white' if empty_mask & (1 << i) else 'orange')
+
+    # Show the falling payload if it exists
     if drop_payload_data:
-        x, y = drop_payload_data
-        payload = plt.Circle((x, y), PAYLOAD_RADIUS, color='orange', fill=True)
-        ax.add_artist(payload)
+        drop_patch.center = drop_payload_data
+    drop_patch.set_visible(bool(drop_payload_data))
 
 # Animation update function
 def update(frame):
-    ax.clear()
-    init_plot()
-    draw_fuselage()
-    draw_gravity_arrow()
-
     time = (frame / FPS) * ANIMATION_SPEEDUP  # Adjust time for speedup
     cycle = int(time // DROP_INTERVAL)
     phase_time = time % DROP_INTERVAL
 
-    # Initialize position variables
-    empty_slots = set()
-    drop_payload_data = None
-
-    # Calculate base rotation from completed cycles
-    if cycle == 0:
-        rotation_angle = 0
-    elif cycle == 1:
-        rotation_angle = np.pi
-    elif cycle == 2:
-        rotation_angle = 3*np.pi/2
-    elif cycle == 3:
-        rotation_angle = 5*np.pi/2
-    else:  # Reset animation after all payloads dropped
+    if cycle >= len(CYCLE_SPEC):  # Reset animation after all payloads dropped
         if phase_time < 1.0:  # 1 second delay before reset
-            empty_slots = {0, 1, 2, 3}
-            rotation_angle = 5*np.pi/2
+            draw_launcher(CYCLE_SPEC[-1][0], 0b1111, None)
         else:
-            empty_slots = set()
-            rotation_angle = 0
-        draw_launcher(rotation_angle, empty_slots, None)
+            draw_launcher(0, 0, None)
+        time_text.set_visible(False)
         return
 
-    # Set empty slots based on completed cycles
-    if cycle >= 1:
-        empty_slots.add(2)  # After first cycle: top empty
-    if cycle >= 2:
-        empty_slots.update({0, 2})  # After second cycle: top and bottom empty
-    if cycle >= 3:
-        empty_slots.update({0, 1, 3})  # After third cycle: all but top empty
+    drop_angle, empty_before, empty_after, rotation_start, rotation_sweep, rotation_duration = \
+        CYCLE_SPEC[cycle]
 
     # Handle current cycle
+    drop_payload_data = None
     if phase_time <= (DROP_MARGIN + ACTUAL_DROP_TIME):
         # Active dropping phase
+        rotation_angle = drop_angle
+        empty_mask = empty_before
         if phase_time >= DROP_MARGIN:
             drop_time = phase_time - DROP_MARGIN
             falling_distance = 0.5 * GRAVITY * (drop_time ** 2)
             drop_payload_data = (0, -FUSELAGE_DIAMETER/2 - falling_distance)
             if drop_time > 0:
-                if cycle == 0:
-                    empty_slots.add(0)  # Clear bottom after first drop
-                elif cycle == 1:
-                    empty_slots.add(0)  # Clear bottom after second drop
-                elif cycle == 2:
-                    empty_slots = {0, 1, 3}  # Keep only top payload (slot 2)
-                elif cycle == 3:
-                    empty_slots.update({0, 1, 2, 3})  # Clear all after final drop
+                empty_mask = empty_after
     else:
         # Rotation phase
         rotation_time = phase_time - DROP_TIME
-        
-        if cycle == 0:
-            empty_slots.add(0)
-            rotation_progress = min(1, rotation_time / 2)
-            rotation_angle = rotation_progress * np.pi
-        elif cycle == 1:
-            empty_slots.update({0, 2})
-            rotation_progress = min(1, rotation_time / 1)
-            rotation_angle = np.pi + (rotation_progress * np.pi/2)
-        elif cycle == 2:
-            empty_slots = {0, 1, 3}  # Keep only top payload
-            rotation_progress = min(1, rotation_time / 2)
-            rotation_angle = (rotation_progress * np.pi)  # Start from top position
-        elif cycle == 3:
-            empty_slots.update({0, 1, 2, 3})
-
-    draw_launcher(rotation_angle, empty_slots, drop_payload_data)
-    ax.text(0, -FUSELAGE_DIAMETER - 0.8, f"Time: {time:.1f}s", fontsize=12, ha='center')
+        rotation_progress = min(1, rotation_time / rotation_duration)
+        rotation_angle = rotation_start + rotation_progress * rotation_sweep
+        empty_mask = empty_after
+
+    draw_launcher(rotation_angle, empty_mask, drop_payload_data)
+    time_text.set_text(f"Time: {time:.1f}s")
+    time_text.set_visible(True)
+
+def render_frame(frame):
+    # Update the persistent artists and rasterize the figure to an RGB array
+    update(frame)
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba())[..., :3]
 
 # Create outputs directory if it doesn't exist
 os.makedirs('outputs', exist_ok=True)
 
-# Initialize plot
+# Initialize plot with the static artists, then the ones update() changes
 init_plot()
 draw_fuselage()
 draw_gravity_arrow()
+slot_patches, drop_patch, time_text = create_launcher()
 
-# Animate for 20 seconds real time (40 seconds simulation time)
-ani = animation.FuncAnimation(fig, update, 
-                            frames=20*FPS,  # 20 seconds of real time
-                            interval=1000/FPS)  # Interval in milliseconds
-
-# Save the animation
-ani.save('outputs/rotary_launcher.gif', writer='pillow', fps=FPS)
\ No newline at end of file
+# Render 20 seconds real time (40 seconds simulation time) straight into the GIF, one
+# frame at a time (duration is the frame interval in milliseconds)
+with imageio.get_writer('outputs/rotary_launcher.gif', mode='I', duration=1000/FPS, loop=0) as writer:
+    for frame in range(20*FPS):
+        writer.append_data(render_frame(frame))
\ No newline at end of file